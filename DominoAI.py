@@ -0,0 +1,393 @@
+"""
+Monte Carlo AI shared by every game mode.
+
+The GUIs hand the live DominoGame to monte_carlo_ai_move, which scores each
+valid tile by playing it on a lightweight SimState and finishing copies of that
+position with random playouts.
+"""
+
+import math
+import os
+import random
+import time
+from DominoEngine import PASS, DRAW, SimState, make_rng, spawn_rngs, random_bit, iter_bits
+from DominoPlayout import playout_batch, cut_playout_wins, leaf_value
+from DominoBatchPlayout import playout_wins, available as vectorized_available
+from DominoEndgame import ENDGAME_TILES, LOSS, endgame_ready, solve_endgame
+from DominoOpeningBook import OpeningBook, load_book
+from DominoMCTS import MCTS, determinize, ismcts_ai_move
+
+# Playouts per task when monte_carlo_ai_move runs on an executor
+PLAYOUT_BATCH = 10
+# Most playouts per move in a timed round of the NumPy batch kernel; rounds start
+# at one and grow by at most VECTORIZED_GROWTH times per round
+VECTORIZED_ROUND = 256
+VECTORIZED_GROWTH = 4
+# Ways monte_carlo_ai_move can share its playouts between the candidate moves
+ALLOCATIONS = ("uniform", "ucb1", "halving")
+# Searches monte_carlo_ai_move can run: flat playouts or a DominoMCTS.MCTS tree on
+# the real hands, or DominoMCTS.ISMCTS over the hands the player cannot see
+SEARCHES = ("flat", "uct", "ismcts")
+# Exploration weight of the UCB1 bound for win rates in [0, 1]
+UCB1_EXPLORATION = math.sqrt(2)
+
+def monte_carlo_ai_move(game, player_index, simulations=30, rng=None, max_playouts=None,
+                        executor=None, batch_size=PLAYOUT_BATCH, vectorized=False, think_ms=None,
+                        allocation="uniform", rollout_depth=None, endgame_tiles=ENDGAME_TILES,
+                        book=None, search="flat", sampler=None, tree=None):
+    """
+    Evaluate possible moves via Monte Carlo playouts and return best one.
+
+    Playouts run on SimState copies, which track only the open ends, hands, stock
+    and passes instead of the board history the GUI renders. Every candidate move
+    gets its own generator spawned from rng, so a move's estimate does not depend
+    on how many moves were scored before it.
+
+    The total number of playouts is capped, so larger tile sets with many playable
+    tiles spread the budget over the moves instead of multiplying the work.
+
+    With an executor (e.g. a concurrent.futures.ProcessPoolExecutor) the playouts
+    are split into tasks of batch_size playouts for one move each. Workers get the
+    position as a SimState.to_bytes record and return win counts, which are summed
+    per move. Each task is seeded from its move's generator, so a seeded decision
+    is the same however many workers there are.
+
+    With vectorized=True and NumPy installed, each move's playouts run together in
+    DominoBatchPlayout, which makes thousands of simulations per move affordable.
+    Without NumPy the flag is ignored.
+
+    With rollout_depth, playouts stop after that many plays and passes, and an
+    unfinished game counts as leaf_value(...) of a win instead of a full 0 or 1.
+    The NumPy batch playouts always play to the end.
+
+    Given an opening book (e.g. DominoOpeningBook.BOOK_PATH), it is consulted
+    before any search, and a position it covers gets the book move straight
+    away. A missing book file is skipped.
+
+    Once the stock is empty and at most endgame_tiles tiles are left in the hands,
+    DominoEndgame.solve_endgame searches the rest of the game exactly. If it finds
+    a move that wins or ties against any replies, that move is returned without
+    playouts. If every move loses against perfect play, the playouts choose the
+    move most likely to win against real opponents.
+
+    With think_ms, simulations and max_playouts are ignored: playouts run in rounds
+    until the wall-clock budget runs out. At least one round always runs, and the
+    best move so far can be returned after any round. On an executor every round
+    submits at least one task per worker, so no worker sits idle while the round
+    is out. NumPy rounds are sized from the measured time per batch call so that a
+    round takes at most half the time left.
+
+    With search="ismcts" the AI stops seeing the other hands and the stock: the
+    decision goes to DominoMCTS.ismcts_ai_move, which searches over
+    determinizations of the hidden tiles dealt by sampler. The opening book still
+    applies, but the endgame solver, executor, NumPy kernel, allocation and
+    rollout_depth do not. Without think_ms it runs simulations times the number of
+    moves iterations.
+
+    With search="uct" the decision goes to a DominoMCTS.MCTS tree search with the
+    same iteration budget, after the endgame solver had its chance. A caller that
+    keeps one tree per AI seat and passes it on every turn gets the subtree of
+    the position reached reused, so each decision starts from the statistics of
+    the last. The tree's own generator is used instead of rng.
+
+    allocation decides how the playouts are shared between the moves:
+
+    - "uniform" gives every move the same number of playouts.
+    - "ucb1" treats the moves as bandit arms. After one pull each, every pull goes
+      to the move with the highest UCB1 bound, so clearly losing moves stop taking
+      playouts early. The most played move is chosen.
+    - "halving" runs successive halving: the budget is split over log2(moves)
+      rounds, and after each round the worse half of the remaining moves is
+      dropped. The best survivor is chosen.
+
+    Args:
+        game (DominoGame): The live game state. It is never modified.
+        player_index (int): Index of the AI player choosing a move.
+        simulations (int): Number of random playouts per move; with a bandit
+            allocation, simulations times the number of moves is the total budget.
+        rng (int | random.Random | None): Seed or generator for the playouts; None
+            uses the global random module.
+        max_playouts (int | None): Cap on playouts across all moves; None allows
+            simulations times the game's starting hand size.
+        executor (concurrent.futures.Executor | None): Pool to run the playouts on;
+            None runs them in this process.
+        batch_size (int): Playouts per executor task.
+        vectorized (bool): Use the NumPy batch playouts when available.
+        think_ms (float | None): Time budget for the decision in milliseconds.
+        allocation (str): "uniform", "ucb1" or "halving".
+        rollout_depth (int | None): Plies after which playouts are cut off and
+            scored with leaf_value; None plays every game to the end.
+        endgame_tiles (int | None): Tiles in hands at or below which an endgame
+            with an empty stock is solved exactly; None or 0 always uses playouts.
+        book (OpeningBook | str | None): Opening book, or path of a book file, to
+            consult first; None skips the book. A missing file is ignored.
+        search (str): "flat", "uct" or "ismcts".
+        sampler (Callable | None): Determinization function for search="ismcts",
+            e.g. InferenceTracker.sample; None uses DominoMCTS.determinize.
+        tree (MCTS | None): Search tree for search="uct", kept by the caller
+            between decisions; None searches a new tree.
+
+    Returns:
+        int | None: ID of the best tile to play, or None to pass.
+
+    Raises:
+        ValueError: If allocation is not one of ALLOCATIONS or search is not one
+            of SEARCHES.
+    """
+    if allocation not in ALLOCATIONS:
+        raise ValueError(f"Unknown allocation {allocation!r}")
+    if search not in SEARCHES:
+        raise ValueError(f"Unknown search {search!r}")
+    valid_moves = list(iter_bits(game.get_valid_mask(player_index)))
+    if not valid_moves:
+        return None
+    if len(valid_moves) == 1:
+        return valid_moves[0]
+    if book is not None:
+        if not isinstance(book, OpeningBook):
+            book = load_book(book)
+        book_move = book.lookup(game, player_index) if book is not None else None
+        if book_move is not None:
+            return book_move
+    num_moves = len(valid_moves)
+    if max_playouts is None:
+        max_playouts = simulations * game.hand_size
+    simulations = max(1, min(simulations, max_playouts // num_moves))
+    if search == "ismcts":
+        return ismcts_ai_move(game, player_index, think_ms, simulations * num_moves, rng,
+                              sampler or determinize)
+    if endgame_tiles and endgame_ready(game, endgame_tiles):
+        value, move = solve_endgame(game, player_index)
+        if value != LOSS:
+            return move
+    if search == "uct":
+        if tree is None:
+            tree = MCTS(rng=rng)
+        return tree.best_move(game, player_index, simulations * num_moves, think_ms)
+
+    root = SimState.from_game(game)
+    root.current_player = player_index
+    move_rngs = spawn_rngs(make_rng(rng), num_moves)
+    # A team win counts for every member of the team
+    target = game.team_label(player_index) if game.team_mode else player_index
+    vectorized = vectorized and vectorized_available()
+    record = root.to_bytes() if executor is not None else None
+    after_moves = []
+    for move in valid_moves:
+        after_move = root.clone()
+        after_move.play(move)
+        after_moves.append(after_move)
+    wins = [0] * num_moves
+    counts = [0] * num_moves
+    # Seconds per NumPy batch call in the last round, and its playouts per call
+    batch_timing = [0.0, 0]
+
+    def play(pulls):
+        """
+        Run the requested playouts and add them to the totals.
+
+        Args:
+            pulls (list[tuple[int, int]]): (move index, number of playouts) pairs.
+        """
+        if vectorized:
+            start = time.perf_counter()
+            for i, size in pulls:
+                wins[i] += playout_wins(after_moves[i], size, target, move_rngs[i].getrandbits(64))
+            batch_timing[:] = [(time.perf_counter() - start) / len(pulls),
+                               max(size for _, size in pulls)]
+        elif executor is not None:
+            tasks = []
+            for i, size in pulls:
+                for start in range(0, size, batch_size):
+                    tasks.append((i, executor.submit(
+                        playout_batch, record, valid_moves[i], min(batch_size, size - start),
+                        move_rngs[i].getrandbits(64), target, rollout_depth)))
+            for i, task in tasks:
+                wins[i] += task.result()
+        elif rollout_depth is not None:
+            for i, size in pulls:
+                wins[i] += cut_playout_wins(after_moves[i], size, target, rollout_depth,
+                                            move_rngs[i])
+        else:
+            for i, size in pulls:
+                after_move = after_moves[i]
+                move_rng = move_rngs[i]
+                for _ in range(size):
+                    if after_move.clone().playout(move_rng) == target:
+                        wins[i] += 1
+        for i, size in pulls:
+            counts[i] += size
+
+    # Playouts per pull: small enough to stop close to the deadline and to let the
+    # bandits react, large enough to keep the per-call overhead of the batch and
+    # pooled paths small
+    if vectorized:
+        pull_size = VECTORIZED_ROUND
+    elif executor is not None:
+        pull_size = batch_size
+    else:
+        pull_size = 1
+    if think_ms is None:
+        budget = simulations * num_moves
+        deadline = None
+        pull_size = min(pull_size, simulations)
+    else:
+        budget = None
+        deadline = time.perf_counter() + think_ms / 1000
+        if executor is not None and not vectorized:
+            # A round waits for all its tasks, so it needs one task per worker at least
+            pull_size = batch_size * math.ceil(executor_workers(executor) / num_moves)
+
+    def timed_pull(count, until):
+        """
+        Return the playouts per move for a timed round of count pulls.
+
+        NumPy rounds get a size that should take at most half the time left before
+        until, assuming a call costs at most in proportion to its size; the other
+        paths use pull_size.
+
+        Args:
+            count (int): Number of pulls in the round.
+            until (float): time.perf_counter() value the round should end by.
+
+        Returns:
+            int: Playouts per pull, at least 1.
+        """
+        if not vectorized:
+            return pull_size
+        seconds, size = batch_timing
+        if not size:
+            return 1
+        fit = int(size * (until - time.perf_counter()) / (2 * count * seconds))
+        return max(1, min(fit, size * VECTORIZED_GROWTH, VECTORIZED_ROUND))
+
+    def spent():
+        """
+        Report whether the playout or time budget is used up.
+        """
+        if deadline is None:
+            return sum(counts) >= budget
+        return time.perf_counter() >= deadline
+
+    if allocation == "uniform":
+        if deadline is None:
+            play([(i, simulations) for i in range(num_moves)])
+        else:
+            play([(i, timed_pull(num_moves, deadline)) for i in range(num_moves)])
+            while not spent():
+                size = timed_pull(num_moves, deadline)
+                play([(i, size) for i in range(num_moves)])
+        candidates = range(num_moves)
+        key = wins.__getitem__
+    elif allocation == "ucb1":
+        size = pull_size if deadline is None else timed_pull(num_moves, deadline)
+        play([(i, size) for i in range(num_moves)])
+        # An executor gets one pull per move at a time so its workers stay busy;
+        # pulls in flight count as played and lost until they come back
+        width = num_moves if executor is not None else 1
+        while not spent():
+            pending = counts[:]
+            pulls = []
+            for _ in range(width):
+                if budget is not None:
+                    size = min(pull_size, budget - sum(pending))
+                    if size <= 0:
+                        break
+                else:
+                    size = timed_pull(width, deadline)
+                log_total = math.log(sum(pending))
+                i = max(range(num_moves), key=lambda j: wins[j] / pending[j]
+                        + UCB1_EXPLORATION * math.sqrt(log_total / pending[j]))
+                pulls.append((i, size))
+                pending[i] += size
+            play(pulls)
+        candidates = range(num_moves)
+        key = lambda i: (counts[i], wins[i])
+    else:
+        candidates = list(range(num_moves))
+        rounds_left = max(1, math.ceil(math.log2(num_moves)))
+        while True:
+            if deadline is None:
+                size = max(1, (budget - sum(counts)) // (len(candidates) * rounds_left))
+                play([(i, size) for i in candidates])
+            else:
+                # Every remaining round gets an equal share of the remaining time
+                round_end = time.perf_counter() + (deadline - time.perf_counter()) / rounds_left
+                round_pull = pull_size
+                if executor is not None and not vectorized:
+                    # Fewer candidates get more tasks each, so the workers stay busy
+                    round_pull *= math.ceil(num_moves / len(candidates))
+                size = timed_pull(len(candidates), round_end) if vectorized else round_pull
+                play([(i, size) for i in candidates])
+                while time.perf_counter() < round_end:
+                    size = timed_pull(len(candidates), round_end) if vectorized else round_pull
+                    play([(i, size) for i in candidates])
+            if spent():
+                break
+            candidates.sort(key=lambda i: wins[i] / counts[i], reverse=True)
+            candidates = candidates[:(len(candidates) + 1) // 2]
+            if len(candidates) == 1:
+                break
+            rounds_left = max(1, rounds_left - 1)
+        key = lambda i: wins[i] / counts[i]
+
+    best_move = valid_moves[max(candidates, key=key)]
+    return best_move
+
+
+def executor_workers(executor):
+    """
+    Return how many tasks an executor runs at once.
+
+    Args:
+        executor (concurrent.futures.Executor): A WorkerPool or a concurrent.futures
+            pool.
+
+    Returns:
+        int: The pool's size; the number of cores if the executor does not say.
+    """
+    # WorkerPool exposes its size; the concurrent.futures pools only keep it privately
+    for name in ("size", "_max_workers"):
+        workers = getattr(executor, name, None)
+        if workers:
+            return workers
+    return os.cpu_count() or 1
+
+
+def simulate_random_playout(sim_game, trail=None, rng=random, max_plies=None):
+    """
+    Run a random playout until game end to estimate outcome.
+
+    Players follow the same rules the GUIs enforce: draw until a tile can be played,
+    otherwise pass once the stock is empty. Legal moves are read from the bitmask
+    hands, so no tile lists are built along the way.
+
+    Args:
+        sim_game (DominoGame): Game state to play out from its current player.
+        trail (list | None): If given, every undo token is appended to it so the
+            caller can rewind the playout.
+        rng (random.Random): Source of randomness.
+        max_plies (int | None): Stop after this many plays and passes (draws do not
+            count); None plays to the end.
+
+    Returns:
+        int | str | None: Result of sim_game.get_winner(), or None if the playout
+        was cut off. A cut-off game can be scored with
+        leaf_value(SimState.from_game(sim_game), target).
+    """
+    plies_left = -1 if max_plies is None else max_plies
+    while not sim_game.is_game_over():
+        if not plies_left:
+            return None
+        plies_left -= 1
+        player = sim_game.current_player
+        valid = sim_game.get_valid_mask(player)
+        while not valid and sim_game.stock:
+            token = sim_game.apply(DRAW)
+            if trail is not None:
+                trail.append(token)
+            valid = sim_game.get_valid_mask(player)
+        token = sim_game.apply(random_bit(valid, rng) if valid else PASS)
+        if trail is not None:
+            trail.append(token)
+    return sim_game.get_winner()
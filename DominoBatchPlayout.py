@@ -0,0 +1,154 @@
+"""
+Vectorized batch playouts for the Monte Carlo AI.
+
+Plays many random games from the same SimState in lockstep with NumPy: hands are
+boolean arrays over the tile index, and every ply computes the legal moves, draws,
+picks and plays for all unfinished games at once. The moves follow the same policy
+as SimState.playout (draw until a tile fits, pass once the stock is empty, pick
+uniformly among the playable tiles), so the win rates match the Python playouts.
+
+NumPy is optional. Without it, available() is False and monte_carlo_ai_move keeps
+using SimState playouts.
+"""
+
+from DominoEngine import TILES, TILE_PIPS, MAX_PIP, set_size, iter_bits
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+if np is not None:
+    # Lower and higher half and pip count of every tile ID
+    TILE_LOW = np.array([a for a, b in TILES], dtype=np.int64)
+    TILE_HIGH = np.array([b for a, b in TILES], dtype=np.int64)
+    TILE_PIP_ARRAY = np.array(TILE_PIPS, dtype=np.int64)
+    # FITS_END[end + 1, i] is True if tile i can be laid on an open end showing end.
+    # Row 0 stands for the empty board (end -1), where every tile fits.
+    FITS_END = np.zeros((MAX_PIP + 2, len(TILES)), dtype=bool)
+    FITS_END[0] = True
+    for _i, (_a, _b) in enumerate(TILES):
+        FITS_END[_a + 1, _i] = FITS_END[_b + 1, _i] = True
+
+
+def available():
+    """
+    Report whether the vectorized kernel can run.
+
+    Returns:
+        bool: True if NumPy is installed.
+    """
+    return np is not None
+
+
+def playout_winners(state, count, rng):
+    """
+    Play count random games from a state and return their results.
+
+    Args:
+        state (SimState): Starting position. It is not modified.
+        count (int): Number of playouts.
+        rng (numpy.random.Generator): Source of randomness.
+
+    Returns:
+        numpy.ndarray: One result per playout. In free-for-all this is the winning
+        player index, in team mode 0 for "Team 1" and 1 for "Team 2"; -1 is a tie.
+    """
+    num_tiles = set_size(state.max_pip)
+    num_players = state.num_players
+    pass_limit = state.pass_limit
+    fits = FITS_END[:, :num_tiles]
+
+    hands = np.zeros((count, num_players, num_tiles), dtype=bool)
+    for player, mask in enumerate(state.hands):
+        hands[:, player, list(iter_bits(mask))] = True
+    pips = np.tile(np.array(state.pips, dtype=np.int64), (count, 1))
+    tiles_left = np.tile(np.array([mask.bit_count() for mask in state.hands]), (count, 1))
+    left = np.full(count, state.left, dtype=np.int64)
+    right = np.full(count, state.right, dtype=np.int64)
+    # Every playout draws from the same stock order; each keeps its own pointer
+    stock = np.array(state.stock, dtype=np.int64)
+    stock_len = np.full(count, len(state.stock), dtype=np.int64)
+    passes = np.full(count, state.passes, dtype=np.int64)
+    player = np.full(count, state.current_player, dtype=np.int64)
+    emptied = np.full(count, -1 if state.emptied is None else state.emptied, dtype=np.int64)
+
+    active = np.flatnonzero((emptied < 0) & (passes < pass_limit))
+    while active.size:
+        cur = player[active]
+        legal = hands[active, cur] & (fits[left[active] + 1] | fits[right[active] + 1])
+        can_play = legal.any(axis=1)
+
+        # Draw one tile at a time for every game whose player cannot play yet
+        need = ~can_play & (stock_len[active] > 0)
+        while need.any():
+            rows = np.flatnonzero(need)
+            games = active[rows]
+            stock_len[games] -= 1
+            drawn = stock[stock_len[games]]
+            hands[games, cur[rows], drawn] = True
+            pips[games, cur[rows]] += TILE_PIP_ARRAY[drawn]
+            tiles_left[games, cur[rows]] += 1
+            fits_drawn = fits[left[games] + 1, drawn] | fits[right[games] + 1, drawn]
+            legal[rows, drawn] = can_play[rows] = fits_drawn
+            need[rows] = ~fits_drawn & (stock_len[games] > 0)
+
+        # Legal tiles get keys in [1, 2) and the rest [0, 1), so the largest key is
+        # a uniform pick among the legal tiles
+        choice = (rng.random(legal.shape, dtype=np.float32) + legal).argmax(axis=1)
+
+        rows = np.flatnonzero(can_play)
+        games = active[rows]
+        tiles = choice[rows]
+        who = cur[rows]
+        hands[games, who, tiles] = False
+        pips[games, who] -= TILE_PIP_ARRAY[tiles]
+        a, b = TILE_LOW[tiles], TILE_HIGH[tiles]
+        old_left, old_right = left[games], right[games]
+        empty_board = old_left < 0
+        # Same end choice as SimState.play: the left end first
+        on_left = empty_board | (a == old_left) | (b == old_left)
+        left[games] = np.where(empty_board, a,
+                               np.where(a == old_left, b, np.where(b == old_left, a, old_left)))
+        right[games] = np.where(empty_board, b,
+                                np.where(on_left, old_right, np.where(a == old_right, b, a)))
+        passes[games] = 0
+        tiles_left[games, who] -= 1
+        finished = tiles_left[games, who] == 0
+        emptied[games[finished]] = who[finished]
+
+        passes[active[~can_play]] += 1
+        player[active] = (cur + 1) % num_players
+        active = active[(emptied[active] < 0) & (passes[active] < pass_limit)]
+
+    if state.team_mode:
+        team_of = np.array([0 if p in state.teams[0] else 1 for p in range(num_players)])
+        team_pips = np.stack([pips[:, team].sum(axis=1) for team in state.teams], axis=1)
+        by_pips = np.where(team_pips[:, 0] < team_pips[:, 1], 0,
+                           np.where(team_pips[:, 1] < team_pips[:, 0], 1, -1))
+        return np.where(emptied >= 0, team_of[np.maximum(emptied, 0)], by_pips)
+
+    lowest = pips.min(axis=1)
+    sole_lowest = (pips == lowest[:, None]).sum(axis=1) == 1
+    by_pips = np.where(sole_lowest, pips.argmin(axis=1), -1)
+    return np.where(emptied >= 0, emptied, by_pips)
+
+
+def playout_wins(state, count, target, rng):
+    """
+    Count the playouts from a state that end in a given result.
+
+    Args:
+        state (SimState): Starting position. It is not modified.
+        count (int): Number of playouts.
+        target (int | str): Result of get_winner that counts as a win: a player
+            index, or "Team 1"/"Team 2" in team mode.
+        rng (numpy.random.Generator | int): Generator, or a seed for a new one.
+
+    Returns:
+        int: Number of playouts won.
+    """
+    if state.team_mode:
+        target = 0 if target == "Team 1" else 1
+    winners = playout_winners(state, count, np.random.default_rng(rng))
+    return int(np.count_nonzero(winners == target))
@@ -0,0 +1,744 @@
+"""
+Benchmarks for the shared domino engine.
+
+Run this file directly to time every engine primitive on seeded 2-player and
+4-player positions from the start, middle and end of a game, reported in ns/op
+and memory blocks retained per op. Results can be saved to JSON and compared against a saved
+baseline:
+
+    python DominoBenchmark.py --save baseline.json
+    python DominoBenchmark.py --baseline baseline.json
+
+Nothing here needs tkinter or pygame, so it can be run on machines without a display.
+"""
+
+import argparse
+import copy
+import gc
+import json
+import pickle
+import platform
+import random
+import sys
+import time
+import timeit
+from concurrent.futures import ProcessPoolExecutor
+from DominoEngine import DominoGame, SimState, PASS, DRAW, random_bit
+from DominoAI import ALLOCATIONS, monte_carlo_ai_move, simulate_random_playout
+from DominoPlayout import (LEAF_TILE_WEIGHT, LEAF_PIP_WEIGHT, LEAF_END_WEIGHT, LEAF_TURN_WEIGHT,
+                           cut_playout_wins, leaf_value)
+from DominoBatchPlayout import playout_winners, playout_wins, available as vectorized_available
+from DominoEndgame import EndgameSolver, endgame_ready
+
+# Benchmarked table set-ups: seats and team scoring
+MODES = {
+    "2p": (2, False),
+    "4p": (4, False),
+    "4p_team": (4, True),
+}
+PHASES = ("start", "middle", "end")
+
+
+def make_position(num_players, plies=0, seed=0, team_mode=False):
+    """
+    Deal a seeded game and advance it with random moves.
+
+    Args:
+        num_players (int): Number of seats at the table.
+        plies (int): Number of turns to play before returning.
+        seed (int): Seed for the deal and the moves.
+        team_mode (bool): Score the game by teams.
+
+    Returns:
+        DominoGame: The game after the requested number of turns (or at its end).
+    """
+    rng = random.Random(seed)
+    game = DominoGame(num_players, team_mode, rng=rng)
+    for _ in range(plies):
+        if game.is_game_over():
+            break
+        valid = game.get_valid_mask(game.current_player)
+        while not valid and game.stock:
+            game.apply(DRAW)
+            valid = game.get_valid_mask(game.current_player)
+        game.apply(random_bit(valid, rng) if valid else PASS)
+    return game
+
+
+def game_phases(num_players, team_mode=False, seed=0):
+    """
+    Pick the start, middle and end positions of one seeded game.
+
+    Each phase is the turn closest to its target (the lead, half the game and the
+    last turn) where the player to move has at least two playable tiles, so the
+    AI has a real choice to make; without such a turn the target itself is used.
+
+    Args:
+        num_players (int): Number of seats at the table.
+        team_mode (bool): Score the game by teams.
+        seed (int): Seed for the deal and the moves.
+
+    Returns:
+        dict[str, DominoGame]: Positions keyed by PHASES. Every position is before
+        the end of the game, so it still has a move to make.
+    """
+    positions = [make_position(num_players, 0, seed, team_mode)]
+    while not make_position(num_players, len(positions), seed, team_mode).is_game_over():
+        positions.append(make_position(num_players, len(positions), seed, team_mode))
+
+    def with_choice(target):
+        by_distance = sorted(range(len(positions)), key=lambda plies: abs(plies - target))
+        for plies in by_distance:
+            game = positions[plies]
+            valid = game.get_valid_mask(game.current_player)
+            if valid & (valid - 1):
+                return game
+        return positions[target]
+
+    length = len(positions) - 1
+    return {
+        "start": with_choice(0),
+        "middle": with_choice(length // 2),
+        "end": with_choice(length),
+    }
+
+
+def primitive_ops(game, seed=0):
+    """
+    List the engine operations to measure on one position.
+
+    Operations that change the game run on a fresh clone per call; the clone is
+    made outside the timed loop. Operations that need a playable tile or a
+    non-empty stock are left out where the position has none, and the Monte Carlo
+    AI only runs where there are at least two tiles to choose from.
+
+    Args:
+        game (DominoGame): Position to measure on. It is never modified.
+        seed (int): Seed for the playouts.
+
+    Returns:
+        list[tuple[str, Callable, Callable[[], tuple], int]]: Name, operation,
+        factory for its arguments and calls per timing run.
+    """
+    rng = random.Random(seed)
+    player = game.current_player
+    hand = game.players[player]
+    valid = game.get_valid_mask(player)
+    state = SimState.from_game(game)
+    record = state.to_bytes()
+    ops = [
+        ("get_valid_moves", game.get_valid_moves, lambda: (hand,), 5000),
+        ("get_valid_mask", game.get_valid_mask, lambda: (player,), 5000),
+        ("pass_turn", DominoGame.pass_turn, lambda: (game.clone(),), 5000),
+        ("get_winner", game.get_winner, tuple, 5000),
+        ("zobrist_key", game.zobrist_key, tuple, 5000),
+        ("clone", game.clone, tuple, 2000),
+        ("deepcopy", copy.deepcopy, lambda: (game,), 200),
+        ("sim_from_game", SimState.from_game, lambda: (game,), 2000),
+        ("to_bytes", state.to_bytes, tuple, 2000),
+        ("from_bytes", SimState.from_bytes, lambda: (record,), 2000),
+        ("simulate_random_playout", simulate_random_playout,
+         lambda: (game.clone(), None, rng), 200),
+        ("sim_playout", SimState.playout, lambda: (state.clone(), rng), 1000),
+    ]
+    if valid:
+        tile = (valid & -valid).bit_length() - 1
+        ops.append(("play_tile", DominoGame.play_tile, lambda: (game.clone(), player, tile), 2000))
+        ops.append(("apply_undo", lambda g, m: g.undo(g.apply(m)), lambda: (game.clone(), tile), 2000))
+    if valid & (valid - 1):
+        # Without the endgame solver, so late positions still time the playouts
+        ops.append(("monte_carlo_ai_move",
+                    lambda g, p, r: monte_carlo_ai_move(g, p, 30, r, endgame_tiles=0),
+                    lambda: (game, player, rng), 5))
+    if game.stock:
+        ops.append(("draw_from_stock", DominoGame.draw_from_stock,
+                    lambda: (game.clone(), player), 2000))
+    return ops
+
+
+def measure(op, make_args, number, repeat=5):
+    """
+    Time an operation and count the memory blocks it leaves allocated.
+
+    Retained blocks are the growth in sys.getallocatedblocks() over the calls,
+    with every return value kept alive and the garbage collector paused. Blocks
+    allocated and freed inside a call are not counted, so this is what a call
+    leaves behind, not how many allocations it makes.
+
+    Args:
+        op (Callable): The operation.
+        make_args (Callable[[], tuple]): Builds the arguments for one call.
+        number (int): Calls per timing run.
+        repeat (int): Timing runs; the fastest is reported.
+
+    Returns:
+        tuple[float, float]: Nanoseconds per call and retained blocks per call.
+    """
+    best = None
+    for _ in range(repeat):
+        calls = [make_args() for _ in range(number)]
+        start = time.perf_counter_ns()
+        for args in calls:
+            op(*args)
+        elapsed = time.perf_counter_ns() - start
+        best = elapsed if best is None else min(best, elapsed)
+
+    calls = [make_args() for _ in range(number)]
+    kept = [None] * number
+    gc.collect()
+    gc.disable()
+    try:
+        blocks = sys.getallocatedblocks()
+        for i in range(number):
+            kept[i] = op(*calls[i])
+        blocks = sys.getallocatedblocks() - blocks
+    finally:
+        gc.enable()
+    return best / number, blocks / number
+
+
+def run_suite(seed=0, scale=1.0):
+    """
+    Measure every primitive in every mode and game phase.
+
+    Args:
+        seed (int): Seed for the positions and playouts.
+        scale (float): Multiplier on the calls per timing run, e.g. 0.1 for a quick run.
+
+    Returns:
+        dict[str, dict[str, dict[str, dict[str, float]]]]: Results by mode, phase and
+        operation, each with "ns_per_op" and "retained_blocks".
+    """
+    results = {}
+    for mode, (num_players, team_mode) in MODES.items():
+        results[mode] = {}
+        for phase, game in game_phases(num_players, team_mode, seed).items():
+            results[mode][phase] = {}
+            for name, op, make_args, number in primitive_ops(game, seed):
+                ns, retained = measure(op, make_args, max(1, int(number * scale)))
+                results[mode][phase][name] = {"ns_per_op": ns, "retained_blocks": retained}
+    return results
+
+
+def save_results(results, path):
+    """
+    Write suite results to a JSON file, with the interpreter and machine they came from.
+
+    Args:
+        results (dict): Output of run_suite().
+        path (str): File to write.
+    """
+    document = {
+        "python": platform.python_version(),
+        "machine": platform.platform(),
+        "created": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "results": results,
+    }
+    with open(path, "w") as f:
+        json.dump(document, f, indent=2, sort_keys=True)
+
+
+def load_results(path):
+    """
+    Read suite results saved by save_results().
+
+    Args:
+        path (str): File to read.
+
+    Returns:
+        dict: Results by mode, phase and operation.
+    """
+    with open(path) as f:
+        return json.load(f)["results"]
+
+
+def compare(results, baseline):
+    """
+    Pair current results with a baseline, for operations measured in both.
+
+    Args:
+        results (dict): Output of run_suite().
+        baseline (dict): Results loaded from a saved run.
+
+    Returns:
+        list[tuple[str, str, str, float, float, float]]: Mode, phase, operation,
+        baseline ns/op, current ns/op and current/baseline ratio.
+    """
+    rows = []
+    for mode, phases in results.items():
+        for phase, ops in phases.items():
+            for name, current in ops.items():
+                old = baseline.get(mode, {}).get(phase, {}).get(name)
+                if old is None or not old["ns_per_op"]:
+                    continue
+                rows.append((mode, phase, name, old["ns_per_op"], current["ns_per_op"],
+                             current["ns_per_op"] / old["ns_per_op"]))
+    return rows
+
+
+def time_per_call(func, number):
+    """
+    Time a callable and return the best average cost of one call.
+
+    Args:
+        func (Callable[[], object]): The operation to time.
+        number (int): Calls per timing run.
+
+    Returns:
+        float: Microseconds per call, best of five runs.
+    """
+    return min(timeit.repeat(func, number=number, repeat=5)) / number * 1e6
+
+
+def benchmark_clone(number=2000):
+    """
+    Compare DominoGame.clone against copy.deepcopy for 2-player and 4-player states.
+
+    Args:
+        number (int): Copies per timing run.
+
+    Returns:
+        dict[int, tuple[float, float]]: Microseconds per (clone, deepcopy) by player count.
+    """
+    results = {}
+    for num_players in (2, 4):
+        game = make_position(num_players, plies=4)
+        clone_us = time_per_call(game.clone, number)
+        deepcopy_us = time_per_call(lambda: copy.deepcopy(game), number)
+        results[num_players] = (clone_us, deepcopy_us)
+    return results
+
+
+def benchmark_codec(number=2000):
+    """
+    Compare the packed position record against pickling the DominoGame.
+
+    Args:
+        number (int): Round trips per timing run.
+
+    Returns:
+        dict[int, tuple[int, float, int, float]]: By player count, the record size in
+        bytes, us per to_bytes/from_bytes round trip, the pickle size and us per
+        pickle round trip.
+    """
+    results = {}
+    for num_players in (2, 4):
+        game = make_position(num_players, plies=4)
+        record = game.to_bytes()
+        pickled = pickle.dumps(game)
+        record_us = time_per_call(lambda: SimState.from_bytes(game.to_bytes()), number)
+        pickle_us = time_per_call(lambda: pickle.loads(pickle.dumps(game)), number)
+        results[num_players] = (len(record), record_us, len(pickled), pickle_us)
+    return results
+
+
+def benchmark_parallel(workers, simulations=200, decisions=10):
+    """
+    Compare monte_carlo_ai_move run serially and on a process pool.
+
+    Args:
+        workers (int): Pool size.
+        simulations (int): Playouts per move.
+        decisions (int): Decisions timed in each mode, on a 4-player position.
+
+    Returns:
+        tuple[float, float]: Playouts per second serially and on the pool.
+    """
+    game = make_position(4, plies=2)
+    player = game.current_player
+    playouts = simulations * len(game.get_valid_moves(game.players[player])) * decisions
+    with ProcessPoolExecutor(workers) as executor:
+        # Warm the workers up so process start-up is not timed
+        monte_carlo_ai_move(game, player, simulations, rng=0, executor=executor)
+        start = time.perf_counter()
+        for seed in range(decisions):
+            monte_carlo_ai_move(game, player, simulations, rng=seed, executor=executor)
+        pool_time = time.perf_counter() - start
+    start = time.perf_counter()
+    for seed in range(decisions):
+        monte_carlo_ai_move(game, player, simulations, rng=seed)
+    serial_time = time.perf_counter() - start
+    return playouts / serial_time, playouts / pool_time
+
+
+def benchmark_batch(count=4096):
+    """
+    Compare SimState playouts with the NumPy batch kernel. Needs NumPy.
+
+    Args:
+        count (int): Playouts per measurement.
+
+    Returns:
+        dict[int, tuple[float, float]]: Playouts per second (SimState, batch) by
+        player count.
+    """
+    import numpy as np
+    results = {}
+    for num_players in (2, 4):
+        state = SimState.from_game(make_position(num_players))
+        rng = random.Random(0)
+        python_time = min(timeit.repeat(lambda: [state.clone().playout(rng) for _ in range(count)],
+                                        number=1, repeat=3))
+        generator = np.random.default_rng(0)
+        batch_time = min(timeit.repeat(lambda: playout_winners(state, count, generator),
+                                       number=1, repeat=3))
+        results[num_players] = (count / python_time, count / batch_time)
+    return results
+
+
+def move_win_rates(game, player, playouts):
+    """
+    Estimate the win rate of every valid move with a large number of playouts.
+
+    Args:
+        game (DominoGame): Position to score.
+        player (int): Seat to move.
+        playouts (int): Playouts per move.
+
+    Returns:
+        dict[int, float]: Win rate by tile ID.
+    """
+    root = SimState.from_game(game)
+    root.current_player = player
+    target = game.team_label(player) if game.team_mode else player
+    rng = random.Random(0)
+    rates = {}
+    for move in game.get_valid_moves(game.players[player]):
+        after_move = root.clone()
+        after_move.play(move)
+        if vectorized_available():
+            wins = playout_wins(after_move, playouts, target, rng.getrandbits(64))
+        else:
+            wins = sum(after_move.clone().playout(rng) == target for _ in range(playouts))
+        rates[move] = wins / playouts
+    return rates
+
+
+def benchmark_allocation(budgets=(10, 30, 100), positions=20, trials=5, reference=4000):
+    """
+    Compare how well each playout allocation finds the best move for a given budget.
+
+    The best move of a position is the one with the highest win rate over a large
+    number of playouts per move. Only positions with at least three valid moves are used.
+
+    Args:
+        budgets (tuple[int, ...]): Simulations per move passed to monte_carlo_ai_move.
+        positions (int): Number of positions, alternating 2 and 4 players.
+        trials (int): Seeded decisions per position, allocation and budget.
+        reference (int): Playouts per move for the reference win rates.
+
+    Returns:
+        dict[tuple[str, int], tuple[float, float]]: Share of decisions that found the
+        best move and mean win-rate loss against it, by (allocation, budget).
+    """
+    cases = decision_cases(positions, reference)
+    results = {}
+    for allocation in ALLOCATIONS:
+        for budget in budgets:
+            results[allocation, budget] = score_decisions(
+                cases, trials, simulations=budget, allocation=allocation)
+    return results
+
+
+def decision_cases(positions, reference):
+    """
+    Pick positions with a real choice and score their moves for decision benchmarks.
+
+    Args:
+        positions (int): Number of positions, alternating 2 and 4 players, each with
+            at least three valid moves.
+        reference (int): Playouts per move for the reference win rates.
+
+    Returns:
+        list[tuple[DominoGame, int, dict[int, float]]]: Position, seat to move and
+        move_win_rates for each case.
+    """
+    cases = []
+    seed = 0
+    while len(cases) < positions:
+        num_players = 2 if len(cases) % 2 == 0 else 4
+        game = make_position(num_players, plies=seed % 8, seed=seed)
+        seed += 1
+        player = game.current_player
+        if len(game.get_valid_moves(game.players[player])) < 3:
+            continue
+        cases.append((game, player, move_win_rates(game, player, reference)))
+    return cases
+
+
+def score_decisions(cases, trials, **kwargs):
+    """
+    Compare monte_carlo_ai_move decisions with the best moves of decision_cases.
+
+    Args:
+        cases (list[tuple]): Result of decision_cases.
+        trials (int): Seeded decisions per case.
+        **kwargs: Arguments for monte_carlo_ai_move.
+
+    Returns:
+        tuple[float, float]: Share of decisions that found the best move and mean
+        win-rate loss against it.
+    """
+    hits = 0
+    regret = 0.0
+    for game, player, rates in cases:
+        best_rate = max(rates.values())
+        for trial in range(trials):
+            move = monte_carlo_ai_move(game, player, rng=trial, **kwargs)
+            hits += rates[move] == best_rate
+            regret += best_rate - rates[move]
+    decisions = len(cases) * trials
+    return hits / decisions, regret / decisions
+
+
+def benchmark_rollout_depth(depths=(4, 8, 16, None), positions=20, trials=5, reference=4000,
+                            simulations=30, think_ms=20):
+    """
+    Weigh the cost of depth-limited rollouts against the quality of their decisions.
+
+    Args:
+        depths (tuple[int | None, ...]): Rollout depths to compare; None is a full playout.
+        positions (int): Number of decision_cases positions.
+        trials (int): Seeded decisions per position and setting.
+        reference (int): Full playouts per move for the reference win rates.
+        simulations (int): Playouts per move for the fixed-budget decisions.
+        think_ms (float): Time budget for the fixed-time decisions.
+
+    Returns:
+        dict[int | None, tuple[float, float, float, float, float]]: By depth: us per
+        rollout from the start of a 4-player game, then share of best moves found
+        and mean win-rate loss with a fixed number of simulations, then the same
+        with a fixed time budget.
+    """
+    cases = decision_cases(positions, reference)
+    state = SimState.from_game(make_position(4))
+    target = state.current_player
+    results = {}
+    for depth in depths:
+        rng = random.Random(0)
+        if depth is None:
+            rollout = lambda: state.clone().playout(rng) == target
+        else:
+            rollout = lambda: cut_playout_wins(state, 1, target, depth, rng)
+        rollout_us = time_per_call(rollout, 2000)
+        fixed = score_decisions(cases, trials, simulations=simulations, rollout_depth=depth)
+        timed = score_decisions(cases, trials, think_ms=think_ms, rollout_depth=depth)
+        results[depth] = (rollout_us,) + fixed + timed
+    return results
+
+
+def leaf_samples(positions=400, plies=(2, 14), playouts=400, seed=0):
+    """
+    Collect positions cut off early in random games, with their playout win rates.
+
+    Each table set-up of MODES gets the same number of positions. A position is a
+    seeded random game stopped after a random number of plies, as a cut-off
+    rollout would leave it, scored for a random seat (or team) by full playouts.
+
+    Args:
+        positions (int): Positions per table set-up.
+        plies (tuple[int, int]): Fewest and most plies played before the cut.
+        playouts (int): Full random playouts per position.
+        seed (int): Seed for the games and playouts.
+
+    Returns:
+        list[tuple[SimState, int | str, float]]: Position, target and the share of
+        playouts the target won.
+    """
+    rng = random.Random(seed)
+    samples = []
+    for num_players, team_mode in MODES.values():
+        count = 0
+        while count < positions:
+            game = make_position(num_players, rng.randint(*plies), rng.getrandbits(32), team_mode)
+            if game.is_game_over():
+                continue
+            state = SimState.from_game(game)
+            seat = rng.randrange(num_players)
+            target = game.team_label(seat) if team_mode else seat
+            wins = sum(state.clone().playout(rng) == target for _ in range(playouts))
+            samples.append((state, target, wins / playouts))
+            count += 1
+    return samples
+
+
+def fit_leaf_weights(samples, start=None, step=0.1, min_step=0.001):
+    """
+    Fit the leaf_value weights to playout win rates by least squares.
+
+    The weights go through a softmax or logistic function, so they are fitted by
+    a coordinate search: each weight in turn is moved up or down by step while
+    that lowers the squared error, and step is halved whenever no move helps.
+
+    Args:
+        samples (list[tuple[SimState, int | str, float]]): Output of leaf_samples.
+        start (tuple[float, float, float, float] | None): Tile, pip, end and turn
+            weights to start from; None starts from the LEAF_*_WEIGHT constants.
+        step (float): First step size.
+        min_step (float): Step size at which the search stops.
+
+    Returns:
+        tuple[tuple[float, float, float, float], float]: The fitted weights and
+        their mean squared error.
+    """
+    def error(weights):
+        return sum((leaf_value(state, target, weights) - rate) ** 2
+                   for state, target, rate in samples) / len(samples)
+
+    if start is None:
+        start = (LEAF_TILE_WEIGHT, LEAF_PIP_WEIGHT, LEAF_END_WEIGHT, LEAF_TURN_WEIGHT)
+    weights = list(start)
+    best = error(weights)
+    while step >= min_step:
+        improved = False
+        for i in range(len(weights)):
+            for delta in (step, -step):
+                trial = weights[:]
+                trial[i] = max(0.0, trial[i] + delta)
+                trial_error = error(trial)
+                if trial_error < best:
+                    weights, best, improved = trial, trial_error, True
+                    break
+        if not improved:
+            step /= 2
+    return tuple(round(weight, 4) for weight in weights), best
+
+
+def endgame_position(num_players, team_mode, seed, max_tiles):
+    """
+    Play a seeded random game until the stock is empty and few tiles are left.
+
+    Args:
+        num_players (int): Number of seats.
+        team_mode (bool): Whether the game is scored by teams.
+        seed (int): Seed for the deal and the moves.
+        max_tiles (int): Most tiles that may be left in all hands together.
+
+    Returns:
+        DominoGame | None: A position whose player to move has a tile to play, or
+        None if the game ended first.
+    """
+    game = DominoGame(num_players, team_mode, rng=seed)
+    rng = random.Random(seed)
+    while not game.is_game_over():
+        valid = game.get_valid_mask(game.current_player)
+        if valid and endgame_ready(game, max_tiles):
+            return game
+        game.apply(random_bit(valid, rng) if valid else DRAW if game.stock else PASS)
+    return None
+
+
+def benchmark_endgame(tile_counts=(10, 14, 18), games=40):
+    """
+    Time the exact endgame solver by the number of tiles left.
+
+    Args:
+        tile_counts (tuple[int, ...]): Tile thresholds to try.
+        games (int): Seeded games per mode and threshold; games that end before
+            the stock runs out are skipped.
+
+    Returns:
+        dict[tuple[str, int], tuple[int, float, float, int]]: By (mode, tiles):
+        positions solved, mean and worst milliseconds, and most nodes searched.
+    """
+    results = {}
+    for mode, (num_players, team_mode) in MODES.items():
+        for tiles in tile_counts:
+            times = []
+            nodes = []
+            for seed in range(games):
+                game = endgame_position(num_players, team_mode, seed, tiles)
+                if game is None:
+                    continue
+                player = game.current_player
+                target = game.team_label(player) if team_mode else player
+                solver = EndgameSolver()
+                start = time.perf_counter()
+                solver.solve(SimState.from_game(game), target)
+                times.append((time.perf_counter() - start) * 1000)
+                nodes.append(solver.nodes)
+            if times:
+                results[mode, tiles] = (len(times), sum(times) / len(times), max(times), max(nodes))
+    return results
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark the domino engine primitives.")
+    parser.add_argument("--save", metavar="PATH", help="write the results to a JSON file")
+    parser.add_argument("--baseline", metavar="PATH", help="compare against saved results")
+    parser.add_argument("--seed", type=int, default=0, help="seed for positions and playouts")
+    parser.add_argument("--quick", action="store_true", help="run a tenth of the calls")
+    parser.add_argument("--workers", type=int, metavar="N",
+                        help="also compare serial and N-process Monte Carlo playouts")
+    parser.add_argument("--allocation", action="store_true",
+                        help="also compare the playout allocations of the Monte Carlo AI")
+    parser.add_argument("--rollout-depth", action="store_true",
+                        help="also compare depth-limited rollouts with full playouts")
+    parser.add_argument("--fit-leaf", action="store_true",
+                        help="also refit the leaf_value weights to playout win rates")
+    parser.add_argument("--endgame", action="store_true",
+                        help="also time the exact endgame solver")
+    args = parser.parse_args()
+
+    results = run_suite(args.seed, 0.1 if args.quick else 1.0)
+    for mode, phases in results.items():
+        for phase, ops in phases.items():
+            print(f"{mode} {phase}:")
+            for name, row in ops.items():
+                print(f"  {name:<24}{row['ns_per_op']:>14,.0f} ns/op"
+                      f"{row['retained_blocks']:>10.2f} blocks retained/op")
+    if args.save:
+        save_results(results, args.save)
+        print(f"Saved results to {args.save}")
+    if args.baseline:
+        print(f"Change against {args.baseline} (ratio > 1 is slower):")
+        for mode, phase, name, old_ns, new_ns, ratio in compare(results, load_results(args.baseline)):
+            flag = "  <-- slower" if ratio > 1.1 else ""
+            print(f"  {mode} {phase} {name:<24}{old_ns:>12,.0f} -> {new_ns:>12,.0f} ns"
+                  f"  x{ratio:.2f}{flag}")
+
+    if args.workers:
+        serial_rate, pool_rate = benchmark_parallel(args.workers)
+        print(f"Monte Carlo playouts/s: serial {serial_rate:,.0f} | "
+              f"{args.workers} workers {pool_rate:,.0f} | x{pool_rate / serial_rate:.2f}")
+
+    if args.allocation:
+        print("Best move found | mean win-rate loss, by allocation and simulations per move:")
+        for (allocation, budget), (found, loss) in benchmark_allocation().items():
+            print(f"  {allocation:<8}{budget:>5}: {found:6.1%} | {loss:.4f}")
+
+    if args.rollout_depth:
+        print("Rollout depth: us/rollout | 30 simulations: best found, loss "
+              "| 20 ms: best found, loss")
+        for depth, (rollout_us, found, loss, timed_found, timed_loss) in \
+                benchmark_rollout_depth().items():
+            print(f"  {'full' if depth is None else depth:>4}: {rollout_us:8.1f} | "
+                  f"{found:6.1%} {loss:.4f} | {timed_found:6.1%} {timed_loss:.4f}")
+
+    if args.fit_leaf:
+        samples = leaf_samples()
+        current = (LEAF_TILE_WEIGHT, LEAF_PIP_WEIGHT, LEAF_END_WEIGHT, LEAF_TURN_WEIGHT)
+        weights, fitted_error = fit_leaf_weights(samples)
+        current_error = fit_leaf_weights(samples, step=0)[1]
+        print(f"Leaf weights (tile, pip, end, turn): current {current} mse {current_error:.5f} "
+              f"| fitted {weights} mse {fitted_error:.5f}")
+
+    if args.endgame:
+        print("Endgame solver by tiles left: positions, mean ms, worst ms, most nodes")
+        for (mode, tiles), (count, mean_ms, worst_ms, nodes) in benchmark_endgame().items():
+            print(f"  {mode:<8}{tiles:>3}: {count:>3} {mean_ms:8.2f} {worst_ms:8.2f} {nodes:>8,}")
+
+    if vectorized_available():
+        print("Playouts/s, SimState vs NumPy batch:")
+        for num_players, (python_rate, batch_rate) in benchmark_batch().items():
+            print(f"{num_players} players: SimState {python_rate:,.0f} | batch {batch_rate:,.0f} "
+                  f"| x{batch_rate / python_rate:.1f}")
+
+    print("State copy cost (us per copy):")
+    for num_players, (clone_us, deepcopy_us) in benchmark_clone().items():
+        print(f"{num_players} players: clone {clone_us:.2f} | deepcopy {deepcopy_us:.2f} "
+              f"| {deepcopy_us / clone_us:.1f}x faster")
+    print("Position transfer (bytes, us per round trip):")
+    for num_players, (size, record_us, pickle_size, pickle_us) in benchmark_codec().items():
+        print(f"{num_players} players: record {size} B {record_us:.2f} | "
+              f"pickle {pickle_size} B {pickle_us:.2f}")
@@ -0,0 +1,195 @@
+"""
+Exact endgame solver for the domino AI.
+
+Once the stock is empty nothing is left to chance: with every hand visible the
+rest of the game is a small perfect-information tree. EndgameSolver searches it
+with alpha-beta and a transposition table keyed by the Zobrist key of the
+position, and returns a move that is provably best for the searching side.
+
+The result of a game is scored from the searching side's point of view: a win
+is WIN, a tie TIE and anything else LOSS. In team mode the other team moves
+against it. In free-for-all games with more than two players every opponent is
+assumed to play against the searching player (a "paranoid" search), so the
+value is what the player can guarantee.
+
+monte_carlo_ai_move hands positions over to solve_endgame when the stock is
+empty and at most ENDGAME_TILES tiles are left in the hands. It keeps the
+solver's move only when that move is proven not to lose. Against a perfect
+opponent every move of a lost position is equally bad, but real opponents are
+not perfect, so the playouts choose there instead. This matters most in
+paranoid searches, where most positions are lost against the coalition.
+"""
+
+from DominoEngine import SimState, TILE_BIT, TILE_PIPS, ZOBRIST_TURN, iter_bits
+
+# Game values from the searching side's point of view
+WIN = 1
+TIE = 0
+LOSS = -1
+# Transposition table bounds: the stored value is exact, a lower or an upper bound
+EXACT = 0
+LOWER = 1
+UPPER = 2
+# Move value of a pass
+PASS_MOVE = -1
+# Tiles left in all hands at or below which monte_carlo_ai_move solves exactly
+ENDGAME_TILES = 14
+
+
+class EndgameSolver:
+    """
+    Alpha-beta search over positions with an empty stock.
+
+    The transposition tables survive between calls, so solving the following
+    positions of the same endgame reuses earlier work. Each side being searched
+    for has its own table, since values are stored from that side's point of view.
+
+    Attributes:
+        tables (dict[int | str, dict[int, tuple[int, int, int]]]): Per target,
+            Zobrist key -> (value, bound, best move).
+        nodes (int): Positions searched by the last solve().
+    """
+
+    def __init__(self):
+        """
+        Create a solver with empty transposition tables.
+        """
+        self.tables = {}
+        self.nodes = 0
+
+    def clear(self):
+        """
+        Drop every transposition table, e.g. when a new game starts.
+        """
+        self.tables.clear()
+
+    def solve(self, state, target):
+        """
+        Find the value of a position and a move that reaches it.
+
+        Args:
+            state (SimState): Position with an empty stock. It is searched in place
+                and left as it was.
+            target (int | str): Result of get_winner the searching side plays for:
+                a player index, or "Team 1"/"Team 2" in team mode.
+
+        Returns:
+            tuple[int, int | None]: WIN, TIE or LOSS, and the best move for the
+            player to move (a tile ID or PASS_MOVE), or None if the game is over.
+
+        Raises:
+            ValueError: If the stock is not empty.
+        """
+        if state.stock:
+            raise ValueError("The endgame solver needs an empty stock")
+        if state.team_mode:
+            team = state.teams[0] if target == "Team 1" else state.teams[1]
+            ours = [seat in team for seat in range(state.num_players)]
+        else:
+            ours = [seat == target for seat in range(state.num_players)]
+        self.nodes = 0
+        table = self.tables.setdefault(target, {})
+        return self._search(state, LOSS - 1, WIN + 1, table, ours, target)
+
+    def _search(self, state, alpha, beta, table, ours, target):
+        """
+        Alpha-beta search of one position; see solve().
+        """
+        self.nodes += 1
+        if state.emptied is not None or state.passes >= state.pass_limit:
+            winner = state.get_winner()
+            if winner == target:
+                return WIN, None
+            return (TIE if winner == -1 else LOSS), None
+
+        player = state.current_player
+        key = state.hash ^ ZOBRIST_TURN[player]
+        entry = table.get(key)
+        tt_move = None
+        if entry is not None:
+            value, bound, tt_move = entry
+            if (bound == EXACT or (bound == LOWER and value >= beta)
+                    or (bound == UPPER and value <= alpha)):
+                return value, tt_move
+
+        valid = state.valid_mask(player)
+        if valid:
+            # Shed the heaviest tiles first; the table's best move goes before all
+            moves = sorted(iter_bits(valid), key=TILE_PIPS.__getitem__, reverse=True)
+            if tt_move is not None and tt_move in moves:
+                moves.remove(tt_move)
+                moves.insert(0, tt_move)
+        else:
+            moves = [PASS_MOVE]
+
+        maximizing = ours[player]
+        original_alpha, original_beta = alpha, beta
+        best_value = LOSS - 1 if maximizing else WIN + 1
+        best_move = moves[0]
+        for move in moves:
+            saved = (state.left, state.right, state.passes, state.hash)
+            if move == PASS_MOVE:
+                state.pass_turn()
+            else:
+                state.play(move)
+            value = self._search(state, alpha, beta, table, ours, target)[0]
+            state.left, state.right, state.passes, state.hash = saved
+            state.current_player = player
+            if move != PASS_MOVE:
+                state.hands[player] |= TILE_BIT[move]
+                state.pips[player] += TILE_PIPS[move]
+                state.emptied = None
+
+            if maximizing:
+                if value > best_value:
+                    best_value, best_move = value, move
+                    alpha = max(alpha, value)
+            elif value < best_value:
+                best_value, best_move = value, move
+                beta = min(beta, value)
+            if alpha >= beta:
+                break
+
+        if best_value <= original_alpha:
+            bound = UPPER
+        elif best_value >= original_beta:
+            bound = LOWER
+        else:
+            bound = EXACT
+        table[key] = (best_value, bound, best_move)
+        return best_value, best_move
+
+
+def endgame_ready(game, max_tiles=ENDGAME_TILES):
+    """
+    Check whether a position is small enough for the exact solver.
+
+    Args:
+        game (DominoGame): The live game state.
+        max_tiles (int): Largest number of tiles left in all hands together.
+
+    Returns:
+        bool: True if the stock is empty and at most max_tiles tiles are in hands.
+    """
+    return not game.stock and sum(mask.bit_count() for mask in game.hand_masks) <= max_tiles
+
+
+def solve_endgame(game, player_index, solver=None):
+    """
+    Find the provably best move for a player once the stock is empty.
+
+    Args:
+        game (DominoGame): The live game state, with an empty stock. It is never
+            modified.
+        player_index (int): Index of the player to move.
+        solver (EndgameSolver | None): Solver whose tables to use; None uses a new one.
+
+    Returns:
+        tuple[int, int | None]: WIN, TIE or LOSS for the player (or their team),
+        and the ID of the best tile to play, or None to pass.
+    """
+    state = SimState.from_game(game)
+    state.current_player = player_index
+    target = game.team_label(player_index) if game.team_mode else player_index
+    value, move = (solver or EndgameSolver()).solve(state, target)
+    return value, None if move is None or move == PASS_MOVE else move
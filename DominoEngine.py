@@ -0,0 +1,1124 @@
+"""
+Shared domino game engine used by every game mode.
+
+This module holds the single DominoGame class that the 2-player and 4-player
+GUIs and the Monte Carlo AI call into. The number of seats and the team layout
+are parameters of the game instead of being baked into separate copies of the
+class, so the rules (and any optimization of them) live in one place.
+The rules are the Puerto Rican ones used throughout the project.
+"""
+
+import random
+import struct
+from collections import deque
+
+# Team layouts selectable from the menu. Each entry lists the player indices of
+# "Team 1" followed by those of "Team 2".
+TEAM_LAYOUTS = {
+    # Player 1 (0) + AI 1 (1) vs Player 2 (2) + AI 2 (3)
+    "ai_pairs": [[0, 1], [2, 3]],
+    # Both humans (0, 2) vs both AIs (1, 3)
+    "humans_team": [[0, 2], [1, 3]],
+    # Player 1 (0) + AI (3) vs Player 2 (1) + Player 3 (2)
+    "p1": [[0, 3], [1, 2]],
+    # Player 2 (1) + AI (3) vs Player 1 (0) + Player 3 (2)
+    "p2": [[1, 3], [0, 2]],
+    # Player 3 (2) + AI (3) vs Player 1 (0) + Player 2 (1)
+    "p3": [[2, 3], [0, 1]],
+}
+
+# Partners sit across from each other unless a layout says otherwise.
+DEFAULT_TEAMS = [[0, 2], [1, 3]]
+
+# Largest supported set (double-twelve) and table size
+MAX_PIP = 12
+MAX_SEATS = 8
+
+# Fixed tile index shared by every bitmask: tile TILES[i] is bit 1 << i in a
+# hand, stock or played-set mask, whatever order the deck was shuffled in.
+# Tiles are ordered by their higher half, so every double-N set is a prefix:
+# the first 28 tiles are double-six, the first 55 double-nine, all 91 double-twelve.
+TILES = [(i, j) for j in range(MAX_PIP + 1) for i in range(j + 1)]
+TILE_INDEX = {tile: i for i, tile in enumerate(TILES)}
+# Board-oriented (flipped) tiles resolve to the same index
+TILE_INDEX.update({(b, a): i for (a, b), i in list(TILE_INDEX.items())})
+TILE_BIT = [1 << i for i in range(len(TILES))]
+# PIP_MASK[n] has a bit set for every tile showing n pips on either half
+PIP_MASK = [sum(TILE_BIT[i] for i, tile in enumerate(TILES) if n in tile) for n in range(MAX_PIP + 1)]
+FULL_MASK = (1 << len(TILES)) - 1
+# Per-tile lookups, so the engine and AI pass tile IDs (indices into TILES) and
+# the GUIs turn them into display tuples. TILE_FLIPPED[i] is TILES[i] reversed;
+# both orientations are built once here, so laying a tile never allocates.
+TILE_FLIPPED = [(b, a) for a, b in TILES]
+# TILE_PIPS[i] is the pip count of TILES[i]
+TILE_PIPS = [a + b for a, b in TILES]
+TILE_IS_DOUBLE = [a == b for a, b in TILES]
+
+# Zobrist keys: one random 64-bit number per tile and location, open-end value,
+# pass count and side to move. A position's hash is the XOR of the keys that
+# describe it. The generator is seeded so hashes agree across runs and processes.
+_zobrist_rng = random.Random(0x5EED_D0E5)
+ZOBRIST_HAND = [[_zobrist_rng.getrandbits(64) for _ in TILES] for _ in range(MAX_SEATS)]
+ZOBRIST_STOCK = [_zobrist_rng.getrandbits(64) for _ in TILES]
+ZOBRIST_BOARD = [_zobrist_rng.getrandbits(64) for _ in TILES]
+# Indexed by pip + 1, so an empty board (-1) has its own key
+ZOBRIST_LEFT = [_zobrist_rng.getrandbits(64) for _ in range(MAX_PIP + 2)]
+ZOBRIST_RIGHT = [_zobrist_rng.getrandbits(64) for _ in range(MAX_PIP + 2)]
+ZOBRIST_PASSES = [_zobrist_rng.getrandbits(64) for _ in range(MAX_SEATS + 1)]
+ZOBRIST_TURN = [_zobrist_rng.getrandbits(64) for _ in range(MAX_SEATS)]
+
+# Position records written by SimState.to_bytes: a 16-byte header (tile set, seats,
+# Team 1 seats, open ends, passes, player to move, stock size, Zobrist hash), one
+# little-endian hand mask per seat, then the stock as one tile index per byte,
+# zero-padded to the size of the set. The length depends only on the set and seats.
+RECORD_HEADER = struct.Struct("<8BQ")
+
+# Non-tile moves accepted by DominoGame.apply
+PASS = "pass"
+DRAW = "draw"
+
+
+def set_size(max_pip):
+    """
+    Number of tiles in a double-N set.
+
+    Args:
+        max_pip (int): Highest pip value in the set (6 for double-six).
+
+    Returns:
+        int: Tile count, e.g. 28 for double-six and 91 for double-twelve.
+    """
+    return (max_pip + 1) * (max_pip + 2) // 2
+
+
+def mask_bytes(max_pip):
+    """
+    Bytes needed to store a bitmask over a double-N set.
+
+    Args:
+        max_pip (int): Highest pip value in the set.
+
+    Returns:
+        int: Width of one packed hand mask.
+    """
+    return (set_size(max_pip) + 7) // 8
+
+
+def record_size(max_pip, num_players):
+    """
+    Length of a SimState.to_bytes record.
+
+    Args:
+        max_pip (int): Highest pip value in the set.
+        num_players (int): Number of seats at the table.
+
+    Returns:
+        int: Record length in bytes, e.g. 52 for double-six with two players.
+    """
+    return RECORD_HEADER.size + num_players * mask_bytes(max_pip) + set_size(max_pip)
+
+
+def default_teams(num_players):
+    """
+    Split the table into two teams of alternating seats.
+
+    Args:
+        num_players (int): Number of seats at the table.
+
+    Returns:
+        list[list[int]]: Player indices of "Team 1" and "Team 2".
+    """
+    return [list(range(0, num_players, 2)), list(range(1, num_players, 2))]
+
+
+def tiles_to_mask(tiles):
+    """
+    Convert a collection of tiles into a bitmask over the fixed tile index.
+
+    Args:
+        tiles (Iterable[tuple[int, int]]): Tiles in either orientation.
+
+    Returns:
+        int: Mask with one bit set per tile.
+    """
+    mask = 0
+    for tile in tiles:
+        mask |= TILE_BIT[TILE_INDEX[tile]]
+    return mask
+
+
+def mask_to_tiles(mask):
+    """
+    Convert a bitmask back into tiles, in tile index order.
+
+    Args:
+        mask (int): Bitmask over the fixed tile index.
+
+    Returns:
+        list[tuple[int, int]]: The tiles whose bits are set.
+    """
+    return [TILES[i] for i in iter_bits(mask)]
+
+
+def iter_bits(mask):
+    """
+    Yield the index of every set bit, lowest first.
+
+    Args:
+        mask (int): Bitmask over the fixed tile index.
+
+    Yields:
+        int: Tile index of each set bit.
+    """
+    while mask:
+        low = mask & -mask
+        yield low.bit_length() - 1
+        mask ^= low
+
+
+def popcount(mask):
+    """
+    Count the tiles in a mask.
+
+    Args:
+        mask (int): Bitmask over the fixed tile index.
+
+    Returns:
+        int: Number of set bits.
+    """
+    return mask.bit_count()
+
+
+def decide_winner(emptied, scores, team_mode, teams):
+    """
+    Apply the end-of-game rules shared by DominoGame and SimState.
+
+    If a player emptied their hand, they (or their team) win. Otherwise, the player
+    or team with the lowest pip count wins; ties return -1.
+
+    Args:
+        emptied (int | None): Index of the player who emptied their hand, if any.
+        scores (list[int]): Pip count left in each player's hand.
+        team_mode (bool): Whether the game is scored by teams.
+        teams (list[list[int]]): Player indices of "Team 1" and "Team 2".
+
+    Returns:
+        int | str: Winning player index in free-for-all, "Team 1"/"Team 2" in team
+        mode, or -1 for a tie.
+    """
+    if emptied is not None:
+        if team_mode:
+            return "Team 1" if emptied in teams[0] else "Team 2"
+        return emptied
+
+    if team_mode:
+        team_scores = [sum(scores[player] for player in team) for team in teams]
+        if team_scores[0] < team_scores[1]:
+            return "Team 1"
+        elif team_scores[1] < team_scores[0]:
+            return "Team 2"
+        return -1
+
+    # Lowest total wins; two or more players sharing it is a tie
+    lowest_score = min(scores)
+    if scores.count(lowest_score) > 1:
+        return -1
+    return scores.index(lowest_score)
+
+
+def zobrist_hash(hands, stock_mask, played_mask, left, right, passes):
+    """
+    Compute a position hash from scratch.
+
+    The side to move is not included; see DominoGame.zobrist_key.
+
+    Args:
+        hands (list[int]): Bitmask of each player's hand.
+        stock_mask (int): Bitmask of the stock.
+        played_mask (int): Bitmask of the tiles on the board.
+        left (int): Open pip on the left end, or -1 for an empty board.
+        right (int): Open pip on the right end, or -1 for an empty board.
+        passes (int): Number of consecutive passes.
+
+    Returns:
+        int: 64-bit Zobrist hash.
+    """
+    h = ZOBRIST_LEFT[left + 1] ^ ZOBRIST_RIGHT[right + 1] ^ ZOBRIST_PASSES[passes]
+    for player, hand in enumerate(hands):
+        for i in iter_bits(hand):
+            h ^= ZOBRIST_HAND[player][i]
+    for i in iter_bits(stock_mask):
+        h ^= ZOBRIST_STOCK[i]
+    for i in iter_bits(played_mask):
+        h ^= ZOBRIST_BOARD[i]
+    return h
+
+
+def make_rng(seed=None):
+    """
+    Turn a seed into a source of randomness.
+
+    Args:
+        seed (int | random.Random | None): A seed for a new generator, an existing
+            generator to use as is, or None for the shared global random module.
+
+    Returns:
+        random.Random: Generator to draw from (the random module itself for None).
+    """
+    if seed is None:
+        return random
+    if isinstance(seed, random.Random):
+        return seed
+    return random.Random(seed)
+
+
+def spawn_rngs(rng, count):
+    """
+    Derive independent generators from a parent, e.g. one per worker or per move.
+
+    Each child is seeded with 128 fresh bits from the parent, so a seeded parent
+    gives the same children every run and children never share a state.
+
+    Args:
+        rng (random.Random): Parent generator.
+        count (int): Number of generators to create.
+
+    Returns:
+        list[random.Random]: The child generators.
+    """
+    return [random.Random(rng.getrandbits(128)) for _ in range(count)]
+
+
+def random_bit(mask, rng=random):
+    """
+    Pick the index of one set bit uniformly at random.
+
+    Args:
+        mask (int): Non-empty bitmask over the fixed tile index.
+        rng (random.Random): Source of randomness.
+
+    Returns:
+        int: Tile index of the chosen bit.
+    """
+    # Drop a random number of low bits, then take the lowest remaining one
+    for _ in range(rng.randrange(mask.bit_count())):
+        mask &= mask - 1
+    return (mask & -mask).bit_length() - 1
+
+
+class DominoGame:
+    """
+    Core game logic for Domino, shared by all game modes.
+
+    Handles tile creation, shuffling, dealing, move validation, drawing from stock,
+    turn passing, and determining game end and winner.
+
+    Attributes:
+        num_players (int): Number of seats at the table (2 to MAX_SEATS).
+        max_pip (int): Highest pip value of the tile set (6, 9 or 12).
+        hand_size (int): Tiles dealt to each player.
+        team_mode (bool): Whether the game is scored by teams.
+        layout (str | None): Team layout key from TEAM_LAYOUTS.
+        teams (list[list[int]]): Player indices of "Team 1" and "Team 2" (empty outside team mode).
+        tiles (list[int]): IDs of all domino tiles in the game, in dealt order.
+        players (list[list[int]]): Tile IDs in each player's hand, built from
+            hand_masks on access (see the property).
+        stock (list[int]): Tile IDs remaining to draw; the last one is drawn next.
+        board (deque[tuple[int, int]]): The tiles on the table as display tuples,
+            oriented so touching halves match.
+        board_owners (deque[int]): Which player placed each tile on the board.
+        left (int): Open pip on the left end, or -1 while the board is empty.
+        right (int): Open pip on the right end, or -1 while the board is empty.
+        current_player (int): Index of the player whose turn it is.
+        passes (int): Number of consecutive passes.
+        pass_limit (int): Consecutive passes that block the game.
+        highest_double (tuple[int, int] | None): The double that opened the game.
+        starting_player (int): Index of the player who placed the opening double.
+        ai_should_start (bool): Flag indicating that player 1 moves right after the opener.
+        hand_masks (list[int]): Each player's hand as a bitmask over the fixed tile index.
+            This is the only copy of the hands, so adding, removing and finding a
+            tile are single bit operations.
+        stock_mask (int): Bitmask of the tiles left in the stock.
+        played_mask (int): Bitmask of the tiles on the board.
+        pip_totals (list[int]): Pips left in each player's hand, kept up to date on every move.
+        emptied (int | None): Index of the player who emptied their hand, set when it happens.
+        hash (int): Zobrist hash of tile locations, open ends and passes, updated on every move.
+    """
+
+    # Fixed attribute set: smaller instances and a cheap clone()
+    __slots__ = (
+        "num_players", "max_pip", "hand_size", "team_mode", "layout", "teams", "tiles",
+        "stock", "hand_masks", "stock_mask", "played_mask", "pip_totals",
+        "board", "board_owners", "left", "right", "current_player", "passes", "pass_limit", "emptied", "hash", "highest_double",
+        "starting_player", "ai_should_start",
+    )
+
+    def __init__(self, num_players=2, team_mode=False, layout=None, rng=None,
+                 max_pip=6, hand_size=7):
+        """
+        Initialize the game by creating, shuffling and dealing the tiles, setting up the
+        stock and board, and placing the opening double. This follows Puerto Rico's
+        "Regla del 6": whoever holds the highest double places it and the next seat plays.
+
+        Args:
+            num_players (int): Number of seats at the table, up to MAX_SEATS.
+            team_mode (bool): Enable team scoring if True.
+            layout (str | None): Team layout key from TEAM_LAYOUTS, only used in team mode.
+            rng (int | random.Random | None): Seed or generator for the shuffle; None
+                uses the global random module.
+            max_pip (int): Highest pip value of the tile set, up to MAX_PIP.
+            hand_size (int): Tiles dealt to each player.
+
+        Raises:
+            ValueError: If the set or seat count is unsupported, team mode has an odd
+                number of seats, or there are not enough tiles to deal every hand.
+        """
+        if not 0 <= max_pip <= MAX_PIP:
+            raise ValueError(f"Tile sets go up to double-{MAX_PIP}")
+        if not 2 <= num_players <= MAX_SEATS:
+            raise ValueError(f"Games seat 2 to {MAX_SEATS} players")
+        if team_mode and num_players % 2:
+            raise ValueError("Team games need an even number of players")
+        if num_players * hand_size > set_size(max_pip):
+            raise ValueError("Not enough tiles to deal every hand")
+        self.num_players = num_players
+        self.max_pip = max_pip
+        self.hand_size = hand_size
+        self.team_mode = team_mode
+        self.layout = layout
+        if not team_mode:
+            self.teams = []
+        elif num_players == 4:
+            self.teams = TEAM_LAYOUTS.get(layout, DEFAULT_TEAMS)
+        else:
+            # The named layouts are for four seats; larger tables alternate seats
+            self.teams = default_teams(num_players)
+
+        # Creates the domino pieces (tiles) from [0|0] up to [max_pip|max_pip]
+        self.tiles = list(range(set_size(max_pip)))
+        # Shuffles the tiles
+        make_rng(rng).shuffle(self.tiles)
+        # Deals hand_size tiles to each player
+        hands = [self.tiles[i * hand_size:(i + 1) * hand_size] for i in range(num_players)]
+        # Keeps stock of the available tiles
+        self.stock = self.tiles[num_players * hand_size:]
+        # Hands are bitmasks; the stock and board also get masks, kept in sync by every mutation
+        self.hand_masks = [sum(TILE_BIT[i] for i in hand) for hand in hands]
+        self.stock_mask = sum(TILE_BIT[i] for i in self.stock)
+        self.played_mask = 0
+        # Running pip count of each hand, so scoring never re-sums the tiles
+        self.pip_totals = [sum(TILE_PIPS[i] for i in hand) for hand in hands]
+        # Stores the placed tiles and, separately, who placed each one
+        self.board = deque()
+        self.board_owners = deque()
+        # Open ends, so move checks never look inside the board
+        self.left = self.right = -1
+        self.current_player = 0
+        self.passes = 0
+        # Everybody passing in a row blocks the game
+        self.pass_limit = num_players
+        # Set by the move that empties a hand, so the game-over check is a field read
+        self.emptied = None
+        self.highest_double = None
+        self.starting_player = 0
+        self.ai_should_start = False
+
+        # Highest double in any hand opens the game
+        for n in range(max_pip, -1, -1):
+            double = TILE_INDEX[(n, n)]
+            opener = self._holder_of(double)
+            if opener is not None:
+                self.highest_double = TILES[double]
+                self.hand_masks[opener] ^= TILE_BIT[double]
+                self.played_mask |= TILE_BIT[double]
+                self.pip_totals[opener] -= 2 * n
+                self.board.append(TILES[double])
+                self.board_owners.append(opener)
+                self.left = self.right = n
+                self.starting_player = opener
+                self.current_player = self.next_player(opener)
+                self.ai_should_start = self.current_player == 1
+                break
+
+        self.hash = zobrist_hash(self.hand_masks, self.stock_mask, self.played_mask,
+                                 self.left, self.right, self.passes)
+
+    def clone(self):
+        """
+        Return an independent copy of the game for simulations.
+
+        Only the mutable state (hands, stock, board and counters) is copied. The team
+        layout and the dealt deck are never modified after __init__, so the copy shares
+        them with the original. This is much cheaper than copy.deepcopy.
+
+        Returns:
+            DominoGame: A game in the same position that can be played on freely.
+        """
+        other = DominoGame.__new__(DominoGame)
+        other.num_players = self.num_players
+        other.max_pip = self.max_pip
+        other.hand_size = self.hand_size
+        other.team_mode = self.team_mode
+        other.layout = self.layout
+        other.teams = self.teams
+        other.tiles = self.tiles
+        other.stock = self.stock[:]
+        other.hand_masks = self.hand_masks[:]
+        other.stock_mask = self.stock_mask
+        other.played_mask = self.played_mask
+        other.pip_totals = self.pip_totals[:]
+        other.board = self.board.copy()
+        other.board_owners = self.board_owners.copy()
+        other.left = self.left
+        other.right = self.right
+        other.current_player = self.current_player
+        other.passes = self.passes
+        other.pass_limit = self.pass_limit
+        other.emptied = self.emptied
+        other.hash = self.hash
+        other.highest_double = self.highest_double
+        other.starting_player = self.starting_player
+        other.ai_should_start = self.ai_should_start
+        return other
+
+    @property
+    def players(self):
+        """
+        Each player's hand as a list of tile IDs, for display and legacy callers.
+
+        The lists are built from hand_masks on every access and list the tiles in
+        ascending ID order, so a hand keeps a stable order between redraws.
+
+        Returns:
+            list[list[int]]: Tile IDs in each player's hand.
+        """
+        return [list(iter_bits(mask)) for mask in self.hand_masks]
+
+    def _holder_of(self, tile):
+        """
+        Find which player holds a tile.
+
+        Args:
+            tile (int): ID of the tile to look for.
+
+        Returns:
+            int | None: Index of the player holding the tile, or None if nobody does.
+        """
+        bit = TILE_BIT[tile]
+        for i, hand_mask in enumerate(self.hand_masks):
+            if hand_mask & bit:
+                return i
+        return None
+
+    def next_player(self, player):
+        """
+        Return the seat that plays after the given one.
+
+        Args:
+            player (int): Index of a player.
+
+        Returns:
+            int: Index of the next player in turn order.
+        """
+        return (player + 1) % self.num_players
+
+    def is_valid_move(self, tile, end):
+        """
+        Check if a tile can be placed at a given end of the board.
+
+        Args:
+            tile (int): ID of the domino tile to check.
+            end (int): The number at the board end to match.
+
+        Returns:
+            bool: True if the tile contains the value 'end'.
+        """
+        return end in TILES[tile]
+
+    def get_valid_moves(self, hand):
+        """
+        List valid moves for a given hand based on current board ends.
+        If the board is empty, any tile is valid.
+
+        Args:
+            hand (list[int]): Tile IDs in the player's current hand.
+
+        Returns:
+            list[int]: IDs of the tiles that can be legally played.
+        """
+        if self.left < 0:
+            return hand
+        ends = PIP_MASK[self.left] | PIP_MASK[self.right]
+        return [t for t in hand if ends & TILE_BIT[t]]
+
+    def get_valid_mask(self, player):
+        """
+        Bitmask version of get_valid_moves for one player's hand.
+
+        Args:
+            player (int): Index of the player.
+
+        Returns:
+            int: Mask of the tiles in the player's hand that can be legally played.
+        """
+        if self.left < 0:
+            return self.hand_masks[player]
+        return self.hand_masks[player] & (PIP_MASK[self.left] | PIP_MASK[self.right])
+
+    def draw_from_stock(self, player):
+        """
+        Draw a tile from the stock for a player if available.
+
+        Args:
+            player (int): Index of the player drawing.
+
+        Returns:
+            int | None: ID of the drawn tile, or None if stock is empty.
+        """
+        if self.stock:
+            drawn_tile = self.stock.pop()
+            self.stock_mask ^= TILE_BIT[drawn_tile]
+            self.hand_masks[player] |= TILE_BIT[drawn_tile]
+            self.pip_totals[player] += TILE_PIPS[drawn_tile]
+            self.hash ^= ZOBRIST_STOCK[drawn_tile] ^ ZOBRIST_HAND[player][drawn_tile]
+            return drawn_tile
+        return None
+
+    def play_tile(self, player, tile):
+        """
+        Place a tile on the board for a player if the move is valid.
+
+        Tiles are oriented correctly to match the board end. The left end is tried first.
+
+        Args:
+            player (int): Index of the player playing.
+            tile (int): ID of the tile to play.
+
+        Raises:
+            ValueError: If the move is invalid.
+        """
+        if not self.hand_masks[player] & TILE_BIT[tile]:
+            raise ValueError("Tile is not in the player's hand")
+        left, right = self.left, self.right
+        a, b = TILES[tile]
+        if left < 0:
+            self.board.append(TILES[tile])
+            self.board_owners.append(player)
+            self.left, self.right = a, b
+        elif b == left:
+            self.board.appendleft(TILES[tile])
+            self.board_owners.appendleft(player)
+            self.left = a
+        elif a == left:
+            self.board.appendleft(TILE_FLIPPED[tile])
+            self.board_owners.appendleft(player)
+            self.left = b
+        elif a == right:
+            self.board.append(TILES[tile])
+            self.board_owners.append(player)
+            self.right = b
+        elif b == right:
+            self.board.append(TILE_FLIPPED[tile])
+            self.board_owners.append(player)
+            self.right = a
+        else:
+            raise ValueError("Invalid move")
+        self.hand_masks[player] ^= TILE_BIT[tile]
+        if not self.hand_masks[player]:
+            self.emptied = player
+        self.played_mask |= TILE_BIT[tile]
+        self.pip_totals[player] -= TILE_PIPS[tile]
+        # Tile moves from the hand to the board, the ends change and the passes reset
+        self.hash ^= (ZOBRIST_HAND[player][tile] ^ ZOBRIST_BOARD[tile]
+                      ^ ZOBRIST_LEFT[left + 1] ^ ZOBRIST_LEFT[self.left + 1]
+                      ^ ZOBRIST_RIGHT[right + 1] ^ ZOBRIST_RIGHT[self.right + 1]
+                      ^ ZOBRIST_PASSES[self.passes] ^ ZOBRIST_PASSES[0])
+        self.passes = 0
+
+    def pass_turn(self):
+        """
+        Record a pass for the current player, incrementing the pass counter.
+        """
+        self.hash ^= ZOBRIST_PASSES[self.passes] ^ ZOBRIST_PASSES[self.passes + 1]
+        self.passes += 1
+
+    def apply(self, move):
+        """
+        Make a move for the current player and return a token that undoes it.
+
+        Playing a tile or passing hands the turn to the next seat. Drawing keeps the
+        turn, since the player may still be able to play the drawn tile.
+
+        Args:
+            move (int | str): ID of a tile in the current player's hand, PASS or DRAW.
+
+        Returns:
+            tuple: Undo token to hand back to undo().
+
+        Raises:
+            ValueError: If the tile cannot be played or the stock is empty.
+        """
+        player = self.current_player
+        token_tail = (self.left, self.right, self.passes, self.hash)
+        if move == DRAW:
+            if not self.stock:
+                raise ValueError("Stock is empty")
+            drawn_tile = self.draw_from_stock(player)
+            return (DRAW, player, drawn_tile, False) + token_tail
+        if move == PASS:
+            self.pass_turn()
+            self.current_player = self.next_player(player)
+            return (PASS, player, 0, False) + token_tail
+        # Remember which end the tile goes to, so undo() can take it back off the
+        # board. play_tile tries the left end first.
+        at_left = self.left >= 0 and self.left in TILES[move]
+        self.play_tile(player, move)
+        self.current_player = self.next_player(player)
+        return (move, player, move, at_left) + token_tail
+
+    def undo(self, token):
+        """
+        Take back a move made with apply().
+
+        Tokens must be undone in the reverse order they were made.
+
+        Args:
+            token (tuple): Token returned by apply().
+        """
+        move, player, tile, at_left, self.left, self.right, self.passes, self.hash = token
+        self.current_player = player
+        if move == PASS:
+            return
+        if move == DRAW:
+            self.stock.append(tile)
+            self.stock_mask |= TILE_BIT[tile]
+            self.hand_masks[player] ^= TILE_BIT[tile]
+            self.pip_totals[player] -= TILE_PIPS[tile]
+            return
+        if at_left:
+            self.board.popleft()
+            self.board_owners.popleft()
+        else:
+            self.board.pop()
+            self.board_owners.pop()
+        self.emptied = None
+        self.hand_masks[player] |= TILE_BIT[move]
+        self.played_mask ^= TILE_BIT[move]
+        self.pip_totals[player] += TILE_PIPS[move]
+
+    def is_game_over(self):
+        """
+        Check if the game has ended.
+
+        The game ends when a player has no tiles or every player passes consecutively.
+        Both conditions are tracked as moves are made, so this is a constant-time check.
+
+        Returns:
+            bool: True if the game is over.
+        """
+        return self.emptied is not None or self.passes >= self.pass_limit
+
+    def zobrist_key(self):
+        """
+        Return a 64-bit key identifying the position, including the side to move.
+
+        The side to move is folded in here rather than tracked in self.hash, because
+        the GUIs hand the turn on by assigning current_player directly.
+
+        Returns:
+            int: Zobrist key for transposition tables and evaluation caches.
+        """
+        return self.hash ^ ZOBRIST_TURN[self.current_player]
+
+    def to_bytes(self):
+        """
+        Pack the position into a fixed-size record, see SimState.to_bytes.
+
+        The board history and tile orientations are not included, so the record
+        decodes to a SimState rather than a DominoGame.
+
+        Returns:
+            bytes: The packed position.
+        """
+        return SimState.from_game(self).to_bytes()
+
+    def team_label(self, player):
+        """
+        Return the name of the team a player belongs to.
+
+        Args:
+            player (int): Index of a player.
+
+        Returns:
+            str: "Team 1" or "Team 2".
+        """
+        return "Team 1" if player in self.teams[0] else "Team 2"
+
+    def team_totals(self):
+        """
+        Return the pips left in each team's hands.
+
+        Returns:
+            list[int]: Pip totals of "Team 1" and "Team 2".
+        """
+        return [sum(self.pip_totals[player] for player in team) for team in self.teams]
+
+    def get_winner(self):
+        """
+        Determine the winner of the game.
+
+        If a player emptied their hand, they (or their team) win. Otherwise, the player
+        or team with the lowest pip count wins; ties return -1.
+
+        Returns:
+            int | str: Winning player index in free-for-all, "Team 1"/"Team 2" in team
+            mode, or -1 for a tie.
+        """
+        return decide_winner(self.emptied, self.pip_totals, self.team_mode, self.teams)
+
+
+class SimState:
+    """
+    Minimal game state for Monte Carlo playouts.
+
+    Holds only what decides the outcome: the two open pips, each hand as a bitmask,
+    the stock as tile indices in draw order and the pass counter. The board history,
+    board owners and tile orientations that the GUIs render stay in DominoGame.
+
+    Attributes:
+        num_players (int): Number of seats at the table.
+        max_pip (int): Highest pip value of the tile set.
+        team_mode (bool): Whether the game is scored by teams.
+        teams (list[list[int]]): Player indices of "Team 1" and "Team 2".
+        left (int): Open pip on the left end, or -1 while the board is empty.
+        right (int): Open pip on the right end, or -1 while the board is empty.
+        hands (list[int]): Bitmask of each player's hand.
+        pips (list[int]): Pips left in each player's hand.
+        stock (list[int]): Tile indices left in the stock; the last one is drawn next.
+        passes (int): Number of consecutive passes.
+        pass_limit (int): Consecutive passes that block the game.
+        emptied (int | None): Index of the player who emptied their hand.
+        current_player (int): Index of the player whose turn it is.
+        hash (int): Zobrist hash matching DominoGame.hash for the same position.
+    """
+
+    __slots__ = (
+        "num_players", "max_pip", "team_mode", "teams", "left", "right", "hands", "pips", "stock",
+        "passes", "pass_limit", "emptied", "current_player", "hash",
+    )
+
+    @classmethod
+    def from_game(cls, game):
+        """
+        Build a simulation state from a DominoGame position.
+
+        Args:
+            game (DominoGame): The game to copy. It is not modified.
+
+        Returns:
+            SimState: A state in the same position, with game.current_player to move.
+        """
+        state = cls.__new__(cls)
+        state.num_players = game.num_players
+        state.max_pip = game.max_pip
+        state.team_mode = game.team_mode
+        state.teams = game.teams
+        state.left = game.left
+        state.right = game.right
+        state.hands = game.hand_masks[:]
+        state.pips = game.pip_totals[:]
+        state.stock = game.stock[:]
+        state.passes = game.passes
+        state.pass_limit = game.pass_limit
+        state.emptied = game.emptied
+        state.current_player = game.current_player
+        state.hash = game.hash
+        return state
+
+    def clone(self):
+        """
+        Return an independent copy of the state.
+
+        Returns:
+            SimState: A state in the same position.
+        """
+        other = SimState.__new__(SimState)
+        other.num_players = self.num_players
+        other.max_pip = self.max_pip
+        other.team_mode = self.team_mode
+        other.teams = self.teams
+        other.left = self.left
+        other.right = self.right
+        other.hands = self.hands[:]
+        other.pips = self.pips[:]
+        other.stock = self.stock[:]
+        other.passes = self.passes
+        other.pass_limit = self.pass_limit
+        other.emptied = self.emptied
+        other.current_player = self.current_player
+        other.hash = self.hash
+        return other
+
+    def to_bytes(self):
+        """
+        Pack the state into a fixed-size record for worker pools, caches and logs.
+
+        Pip totals and the emptied hand are derived again on decode, so only the
+        hands, stock order, open ends, passes, teams, player to move and hash are
+        stored. See RECORD_HEADER for the layout.
+
+        Returns:
+            bytes: record_size(max_pip, num_players) bytes.
+        """
+        width = mask_bytes(self.max_pip)
+        team_seats = sum(1 << seat for seat in self.teams[0]) if self.team_mode else 0
+        position_hash = self.hash
+        if position_hash is None:
+            # playout() does not keep the hash, so rebuild it for consumed states
+            stock_mask = sum(TILE_BIT[i] for i in self.stock)
+            played_mask = ((1 << set_size(self.max_pip)) - 1) ^ stock_mask
+            for hand in self.hands:
+                played_mask ^= hand
+            position_hash = zobrist_hash(self.hands, stock_mask, played_mask,
+                                         self.left, self.right, self.passes)
+        header = RECORD_HEADER.pack(
+            self.max_pip, self.num_players, team_seats, self.left + 1, self.right + 1,
+            self.passes, self.current_player, len(self.stock), position_hash,
+        )
+        hands = b"".join(hand.to_bytes(width, "little") for hand in self.hands)
+        return header + hands + bytes(self.stock).ljust(set_size(self.max_pip), b"\0")
+
+    @classmethod
+    def from_bytes(cls, data):
+        """
+        Rebuild a state from a record made by to_bytes().
+
+        Args:
+            data (bytes | bytearray | memoryview): The packed position.
+
+        Returns:
+            SimState: The decoded state.
+
+        Raises:
+            ValueError: If the record length does not match its header.
+        """
+        (max_pip, num_players, team_seats, left, right,
+         passes, current_player, stock_len, position_hash) = RECORD_HEADER.unpack_from(data)
+        if len(data) != record_size(max_pip, num_players):
+            raise ValueError("Truncated or malformed position record")
+        width = mask_bytes(max_pip)
+        offset = RECORD_HEADER.size
+        state = cls.__new__(cls)
+        state.num_players = num_players
+        state.max_pip = max_pip
+        state.team_mode = team_seats != 0
+        if state.team_mode:
+            seats = range(num_players)
+            state.teams = [[p for p in seats if team_seats >> p & 1],
+                           [p for p in seats if not team_seats >> p & 1]]
+        else:
+            state.teams = []
+        state.left = left - 1
+        state.right = right - 1
+        state.hands = [int.from_bytes(data[offset + p * width:offset + (p + 1) * width], "little")
+                       for p in range(num_players)]
+        offset += num_players * width
+        state.stock = list(data[offset:offset + stock_len])
+        state.pips = []
+        for hand in state.hands:
+            pips = 0
+            while hand:
+                low = hand & -hand
+                pips += TILE_PIPS[low.bit_length() - 1]
+                hand ^= low
+            state.pips.append(pips)
+        state.passes = passes
+        state.pass_limit = num_players
+        state.emptied = next((p for p, hand in enumerate(state.hands) if not hand), None)
+        state.current_player = current_player
+        state.hash = position_hash
+        return state
+
+    def valid_mask(self, player):
+        """
+        Return the tiles a player can legally play.
+
+        Args:
+            player (int): Index of the player.
+
+        Returns:
+            int: Mask of the playable tiles in the player's hand.
+        """
+        if self.left < 0:
+            return self.hands[player]
+        return self.hands[player] & (PIP_MASK[self.left] | PIP_MASK[self.right])
+
+    def play(self, index):
+        """
+        Play a tile for the current player and hand the turn on.
+
+        The tile goes on the left end when it matches it, like DominoGame.play_tile.
+
+        Args:
+            index (int): Tile index of a legal tile in the current player's hand.
+        """
+        a, b = TILES[index]
+        old_left, old_right = self.left, self.right
+        if self.left < 0:
+            self.left, self.right = a, b
+        elif a == self.left:
+            self.left = b
+        elif b == self.left:
+            self.left = a
+        elif a == self.right:
+            self.right = b
+        else:
+            self.right = a
+        self.hash ^= (ZOBRIST_HAND[self.current_player][index] ^ ZOBRIST_BOARD[index]
+                      ^ ZOBRIST_LEFT[old_left + 1] ^ ZOBRIST_LEFT[self.left + 1]
+                      ^ ZOBRIST_RIGHT[old_right + 1] ^ ZOBRIST_RIGHT[self.right + 1]
+                      ^ ZOBRIST_PASSES[self.passes] ^ ZOBRIST_PASSES[0])
+        self.hands[self.current_player] ^= TILE_BIT[index]
+        self.pips[self.current_player] -= TILE_PIPS[index]
+        if not self.hands[self.current_player]:
+            self.emptied = self.current_player
+        self.passes = 0
+        self.current_player = (self.current_player + 1) % self.num_players
+
+    def draw(self):
+        """
+        Move the next stock tile into the current player's hand. The turn is kept.
+
+        Returns:
+            int: Tile index of the drawn tile.
+        """
+        index = self.stock.pop()
+        self.hands[self.current_player] |= TILE_BIT[index]
+        self.pips[self.current_player] += TILE_PIPS[index]
+        self.hash ^= ZOBRIST_STOCK[index] ^ ZOBRIST_HAND[self.current_player][index]
+        return index
+
+    def pass_turn(self):
+        """
+        Record a pass for the current player and hand the turn on.
+        """
+        self.hash ^= ZOBRIST_PASSES[self.passes] ^ ZOBRIST_PASSES[self.passes + 1]
+        self.passes += 1
+        self.current_player = (self.current_player + 1) % self.num_players
+
+    def is_game_over(self):
+        """
+        Check if the game has ended.
+
+        Returns:
+            bool: True if a hand is empty or every player passed consecutively.
+        """
+        return self.emptied is not None or self.passes >= self.pass_limit
+
+    def zobrist_key(self):
+        """
+        Return a 64-bit key identifying the position, including the side to move.
+
+        Returns:
+            int: The same key DominoGame.zobrist_key gives for this position.
+        """
+        return self.hash ^ ZOBRIST_TURN[self.current_player]
+
+    def get_winner(self):
+        """
+        Determine the winner with the same rules as DominoGame.get_winner.
+
+        Returns:
+            int | str: Winning player index in free-for-all, "Team 1"/"Team 2" in team
+            mode, or -1 for a tie.
+        """
+        return decide_winner(self.emptied, self.pips, self.team_mode, self.teams)
+
+    def playout(self, rng=random, max_plies=None):
+        """
+        Play random legal moves until the game ends.
+
+        Players draw until a tile can be played and pass once the stock is empty,
+        the same policy as DominoAI.simulate_random_playout. The state is consumed:
+        the hash is not maintained inside this loop, so it is cleared at the end.
+        The hands, pips, open ends, passes and player to move are still valid, so a
+        cut-off playout can be scored with DominoPlayout.leaf_value.
+
+        Args:
+            rng (random.Random): Source of randomness.
+            max_plies (int | None): Stop after this many plays and passes (draws do
+                not count); None plays to the end.
+
+        Returns:
+            int | str | None: Result of get_winner() for the finished game, or None
+            if the playout was cut off first.
+        """
+        hands = self.hands
+        pips = self.pips
+        stock = self.stock
+        num_players = self.num_players
+        pass_limit = self.pass_limit
+        left, right = self.left, self.right
+        passes = self.passes
+        player = self.current_player
+        randrange = rng.randrange
+
+        emptied = self.emptied
+        if emptied is None and passes < pass_limit:
+            plies_left = -1 if max_plies is None else max_plies
+            while plies_left:
+                plies_left -= 1
+                hand = hands[player]
+                ends = FULL_MASK if left < 0 else PIP_MASK[left] | PIP_MASK[right]
+                valid = hand & ends
+                while not valid and stock:
+                    index = stock.pop()
+                    bit = TILE_BIT[index]
+                    hand |= bit
+                    pips[player] += TILE_PIPS[index]
+                    valid = bit & ends
+                if valid:
+                    # Uniform pick among the playable tiles
+                    for _ in range(randrange(valid.bit_count())):
+                        valid &= valid - 1
+                    bit = valid & -valid
+                    hand ^= bit
+                    hands[player] = hand
+                    index = bit.bit_length() - 1
+                    pips[player] -= TILE_PIPS[index]
+                    a, b = TILES[index]
+                    if left < 0:
+                        left, right = a, b
+                    elif a == left:
+                        left = b
+                    elif b == left:
+                        left = a
+                    elif a == right:
+                        right = b
+                    else:
+                        right = a
+                    passes = 0
+                    if not hand:
+                        emptied = player
+                        break
+                else:
+                    hands[player] = hand
+                    passes += 1
+                    if passes >= pass_limit:
+                        break
+                player = (player + 1) % num_players
+            else:
+                # Cut off with player to move
+                self.left, self.right = left, right
+                self.passes = passes
+                self.current_player = player
+                self.hash = None
+                return None
+            player = (player + 1) % num_players
+
+        self.left, self.right = left, right
+        self.passes = passes
+        self.emptied = emptied
+        self.current_player = player
+        self.hash = None
+        return decide_winner(emptied, pips, self.team_mode, self.teams)
@@ -1,215 +1,22 @@
-import random
-from collections import deque
 import tkinter as tk
 from tkinter import messagebox
 from PerformanceMeasure import PerformanceTracker
-import copy
+from DominoEngine import DominoGame, TILES, PASS, DRAW
+from DominoAI import monte_carlo_ai_move
+from DominoInference import InferenceTracker
+from DominoMCTS import MCTS
 import pygame
+import sys
 
 """
 Domino game utilizing Monte Carlo AI opponent.
 
-This class defines the DominoGame logic and a corresponding GUI class
-called DominoGUI to play a dominoes game between a human and an AI. This
+This module defines a GUI class called DominoGUI, built on the shared
+DominoGame engine, to play a dominoes game between a human and an AI. This
 game specifically utilizes rules from Puerto Rico so it is not a traditional
 domino score based game.
 """
 
-class DominoGame:
-    """
-        Core game logic for Domino.
-
-        Handles tile creation, shuffling, dealing, move validation, drawing from stock,
-        turn passing, and determining game end and winner. Uses a Monte Carlo
-        approach for AI decision-making.
-
-        Attributes:
-            tiles (List[Tuple[int, int]]): All domino tiles in the game.
-            players (List[List[Tuple[int, int]]]): Two players' hands.
-            stock (List[Tuple[int, int]]): Remaining tiles to draw.
-            board (Deque[Tuple[Tuple[int, int], int]]): Placed tiles with their owner index.
-            current_player (int): Index of the player whose turn it is (0 or 1).
-            passes (int): Number of consecutive passes.
-            highest_double (Optional[Tuple[int, int]]): The highest starting double.
-            ai_should_start (bool): Flag indicating if AI plays first.
-            starting_player (int): Index of the player who started.
-        """
-
-
-    def __init__(self):
-        """
-        This definition initializes the game by creating and shuffling the tiles,
-        dealing to players, setting up the stock and determining the starting player
-        based on the highest double in initial hands. This rule is taken from Puerto Rico's "Regla del 6" rule.
-        """
-
-        # This creates the tiles from (0-0 up to 6-6)
-        self.tiles = [(i, j) for i in range(7) for j in range(i, 7)]
-        # Shuffles the tiles
-        random.shuffle(self.tiles)
-        # Gives the player the tiles to play
-        self.players = [self.tiles[:7], self.tiles[7:14]]
-        # Keeps stock of the available tiles
-        self.stock = self.tiles[14:]
-        # Stores (tile, player)
-        self.board = deque()
-        # Checks who's playing
-        self.current_player = 0
-        # Checks who passed
-        self.passes = 0
-        # Finds the highest double in players' hands
-        self.highest_double = None
-        # Flag to trigger AI move at start
-        self.ai_should_start = False
-        # Index of the player who starts the game
-        self.starting_player = 0
-
-        for n in range(6, -1, -1):
-            if (n, n) in self.players[0]:
-                self.highest_double = (n, n)
-                self.players[0].remove((n, n))
-                self.board.append(((n, n), 0))
-                self.starting_player = 0
-                # AI goes next
-                self.current_player = 1
-                self.ai_should_start = True
-                break
-            elif (n, n) in self.players[1]:
-                self.highest_double = (n, n)
-                self.players[1].remove((n, n))
-                self.board.append(((n, n), 1))
-                self.starting_player = 1
-                # Human goes next
-                self.current_player = 0
-                break
-                        
-
-    def is_valid_move(self, tile, end):
-        """
-               Checks if a tile can be placed at one end of the board or the other.
-
-               Args:
-                   tile (Tuple[int, int]): The domino tile to check.
-                   end (int): The number at the board end to match.
-
-               Returns:
-                   bool: True if the tile contains the value 'end'.
-               """
-        return end in tile
-
-
-
-    def get_valid_moves(self, hand):
-        """
-               List valid moves for a given hand based on current board ends.
-               If the board is empty, any tile is valid.
-
-               Args:
-                   hand (List[Tuple[int, int]]): The player's current hand.
-
-               Returns:
-                   List[Tuple[int, int]]: Tiles that can be legally played.
-               """
-        if not self.board:
-            return hand
-        left, right = self.board[0][0][0], self.board[-1][0][1]
-        return [t for t in hand if self.is_valid_move(t, left) or self.is_valid_move(t, right)]
-
-    def draw_from_stock(self, player):
-        """
-                Draw a tile from the stock for a player if available.
-
-                Args:
-                    player (int): Index of the player drawing (0 or 1).
-
-                Returns:
-                    Optional[Tuple[int, int]]: The drawn tile, or None if stock is empty.
-                """
-        if self.stock:
-            drawn_tile = self.stock.pop()
-            self.players[player].append(drawn_tile)
-            return drawn_tile
-        return None
-
-
-
-    def play_tile(self, player, tile):
-        """
-               Place a tile on the board for a player if the move is valid.
-
-               Tiles are oriented correctly to match the board end.
-
-               Args:
-                   player (int): Index of the player playing (0 or 1).
-                   tile (Tuple[int, int]): The tile to play.
-
-               Raises:
-                   ValueError: If the move is invalid.
-               """
-        if not self.board:
-            self.board.append((tile, player))
-        else:
-            left, right = self.board[0][0][0], self.board[-1][0][1]
-            if self.is_valid_move(tile, left):
-                t = tile if tile[1] == left else (tile[1], tile[0])
-                self.board.appendleft((t, player))
-            elif self.is_valid_move(tile, right):
-                t = tile if tile[0] == right else (tile[1], tile[0])
-                self.board.append((t, player))
-            else:
-                raise ValueError("Invalid move")
-        self.players[player].remove(tile)
-        self.passes = 0
-
-    def pass_turn(self):
-        """
-                Verifies a pass for the current player, incrementing the pass counter.
-                """
-        self.passes += 1
-
-    def is_game_over(self):
-        """
-               Check if the game has ended.
-
-               The game ends when a player has no tiles or both players pass consecutively.
-               This was done to avoid infinite looping.
-
-               Returns:
-                   bool: True if the game is over.
-               """
-        return any(len(p) == 0 for p in self.players) or self.passes >= 2
-
-
-    def get_winner(self):
-        """
-                Determine the winner of the game.
-
-                If a player emptied their hand, they win. Otherwise, the player with
-                the lowest pip count wins; ties return -1.
-
-                Returns:
-                    int: Winning player index (0 or 1), or -1 for a tie.
-                """
-
-        # Calculates total pip count for each player
-        player_scores = []
-        for i, hand in enumerate(self.players):
-            total = sum(tile[0] + tile[1] for tile in hand)
-            player_scores.append((i, total))
-
-        # Sort players by score (lowest total wins)
-        player_scores.sort(key=lambda x: x[1])
-
-        # Check for a tie (two or more players with the same lowest score)
-        lowest_score = player_scores[0][1]
-        tied_players = [i for i, score in player_scores if score == lowest_score]
-
-        if len(tied_players) > 1:
-            return -1  # Tie
-        else:
-            # Index of the winning player
-            return player_scores[0][0]
-
 
 class DominoGUI:
     """
@@ -218,17 +25,25 @@ class DominoGUI:
        Provides controls for playing, drawing, passing, and displays game state.
        """
 
-    def __init__(self, root, tracker):
+    def __init__(self, root, tracker, search="flat"):
         """
                 Initializes GUI components, starts music, and kicks off game loop.
 
                 Args:
                     root (tk.Tk): The main Tkinter window.
+                    search (str): AI search passed to monte_carlo_ai_move; "uct"
+                        keeps a search tree across the AI's turns, "ismcts"
+                        keeps the AI from seeing your hand and the stock.
                 """
         self.root = root
+        self.search = search
         self.tracker = PerformanceTracker() #tracker added
         self.root.title("Domino - You vs AI (Monte Carlo)")
-        self.game = DominoGame()
+        self.game = DominoGame(2)
+        # What the AI can infer about your hand from your draws and passes
+        self.inference = InferenceTracker(self.game, 1)
+        # The AI's search tree for search="uct", reused from turn to turn
+        self.tree = MCTS()
 
         #Frames for Layout
         self.board_frame = tk.Frame(root)
@@ -295,7 +110,7 @@ class DominoGUI:
         for widget in self.board_frame.winfo_children():
             widget.destroy()
 
-        for tile, player in self.game.board:
+        for tile, player in zip(self.game.board, self.game.board_owners):
             color = 'blue' if player == 0 else 'red'
 
             if tile[0] == tile[1]:  # It's a double - display vertically
@@ -319,21 +134,34 @@ class DominoGUI:
         hand = self.game.players[0]
         valid_moves = self.game.get_valid_moves(hand)
         for tile in hand:
-            tile_str = f"[{tile[0]}|{tile[1]}]"
+            low, high = TILES[tile]
+            tile_str = f"[{low}|{high}]"
             btn = tk.Button(self.hand_frame, text=tile_str, font=('Courier', 12), relief='raised',fg = 'blue',
                             state=tk.NORMAL if tile in valid_moves else tk.DISABLED,
                             command=lambda t=tile: self.play_tile(t))
             btn.pack(side=tk.LEFT, padx=4)
 
+    def record_move(self, move, player):
+        """
+        Tell the AI's inference tracker about a move just before it is made.
+
+        Args:
+            move (int | str): ID of the tile about to be played, PASS or DRAW.
+            player (int): Index of the player making the move.
+        """
+        self.inference.record(move, player, self.game.left, self.game.right)
+
     def play_tile(self, tile):
         """
         Handle the human player's play action and update state.
 
         Args:
-            tile (Tuple[int, int]): Tile chosen by player.
+            tile (int): ID of the tile chosen by player.
         """
         try:
+            left, right = self.game.left, self.game.right
             self.game.play_tile(0, tile)
+            self.inference.record(tile, 0, left, right)
             self.after_move()
         except Exception as e:
             messagebox.showerror("Invalid Move", str(e))
@@ -342,6 +170,7 @@ class DominoGUI:
         """
         Handles when a human player is passing their turn.
         """
+        self.record_move(PASS, 0)
         self.game.pass_turn()
         self.after_move()
 
@@ -349,9 +178,11 @@ class DominoGUI:
         """
         Handles human player drawing from stock and update GUI.
         """
+        if self.game.stock:
+            self.record_move(DRAW, 0)
         tile = self.game.draw_from_stock(0)
-        if tile:
-            self.status_label.config(text=f"You drew {tile}")
+        if tile is not None:
+            self.status_label.config(text=f"You drew {TILES[tile]}")
         else:
             self.status_label.config(text="Stock is empty")
         self.draw_hand()
@@ -378,15 +209,20 @@ class DominoGUI:
         valid = self.game.get_valid_moves(hand)
         # Draw until a valid move or stock empty
         while not valid and self.game.stock:
+            self.record_move(DRAW, 1)
             tile = self.game.draw_from_stock(1)
             valid = self.game.get_valid_moves(self.game.players[1])
             self.status_label.config(text="AI drew a tile")
 
-        move = self.monte_carlo_ai_move(simulations=30)
-        if move:
+        move = monte_carlo_ai_move(self.game, 1, think_ms=200,
+                                   search=self.search, sampler=self.inference.sample,
+                                   tree=self.tree)
+        if move is not None:
+            self.record_move(move, 1)
             self.game.play_tile(1, move)
-            self.status_label.config(text=f"AI played {move} (MCS)")
+            self.status_label.config(text=f"AI played {TILES[move]} (MCS)")
         else:
+            self.record_move(PASS, 1)
             self.game.pass_turn()
             self.status_label.config(text="AI passed")
 
@@ -400,59 +236,6 @@ class DominoGUI:
             self.status_label.config(text="Your turn!")
             self.draw_hand()
 
-    def monte_carlo_ai_move(self, simulations=30):
-        """
-        Evaluate possible moves via Monte Carlo playouts and return best one.
-        Currently, it runs 30 simulations per move.
-
-        Args:
-            simulations (int): Number of random playouts per move.
-
-        Returns:
-            Optional[Tuple[int, int]]: Best tile to play or None to pass.
-        """
-        hand = self.game.players[1]
-        valid = self.game.get_valid_moves(hand)
-        if not valid:
-            return None
-
-        scores = {}
-        for m in valid:
-            wins = 0
-            for _ in range(simulations):
-                sim = copy.deepcopy(self.game)
-                try:
-                    sim.play_tile(1, m)
-                except ValueError:
-                    continue
-                if self.simulate_random_playout(sim) == 1:
-                    wins += 1
-            scores[m] = wins / simulations
-        return max(scores, key=scores.get)
-
-    def simulate_random_playout(self, sim_game):
-        """
-        Run a random playout until game end to estimate outcome.
-
-        Args:
-            sim_game (DominoGame): Game state copy.
-
-        Returns:
-            int: Winning player index or -1 for tie.
-        """
-        current = sim_game.current_player
-        while not sim_game.is_game_over():
-            hand = sim_game.players[current]
-            valid = sim_game.get_valid_moves(hand)
-            if valid:
-                sim_game.play_tile(current, random.choice(valid))
-            elif sim_game.stock:
-                sim_game.draw_from_stock(current)
-            else:
-                sim_game.pass_turn()
-            current = 1 - current
-        return sim_game.get_winner()
-
     def update_ai_tile_count(self):
         """
         Refresh label showing how many tiles AI holds.
@@ -464,7 +247,9 @@ class DominoGUI:
         """
          Initiates a new instance of a domino game.
         """
-        self.game = DominoGame()
+        self.game = DominoGame(2)
+        self.inference = InferenceTracker(self.game, 1)
+        self.tree.reset()
 
         # Resets the board and hand displays
         for widget in self.board_frame.winfo_children():
@@ -492,7 +277,7 @@ class DominoGUI:
         Handle end-of-game display and exit. Displays who wins.
         """
         winner = self.game.get_winner()
-        scores = [(i, sum(a + b for a, b in hand), hand) for i, hand in enumerate(self.game.players)]
+        scores = [(i, self.game.pip_totals[i], [TILES[t] for t in hand]) for i, hand in enumerate(self.game.players)]
         summary = "\n".join(
             f"Player {i} ({'You' if i == 0 else 'AI'}): {pts} points | Tiles: {hand}"
             for i, pts, hand in scores
@@ -529,6 +314,13 @@ class DominoGUI:
 #This area runs the app
 
 if __name__ == "__main__":
+    # --uct makes the AI grow one search tree over the game; --ismcts makes it
+    # play from what it can see instead of every hand
+    search = "flat"
+    if "--uct" in sys.argv:
+        search = "uct"
+    if "--ismcts" in sys.argv:
+        search = "ismcts"
     pygame.mixer.init()
     #Copyright free music to set the mood for the game. Just a fun addition.
     pygame.mixer.music.load("BGM.mp3")
@@ -536,5 +328,5 @@ if __name__ == "__main__":
 
     tracker = PerformanceTracker() #tracker added
     root = tk.Tk()
-    app = DominoGUI(root, tracker) #tracker added
+    app = DominoGUI(root, tracker, search) #tracker added
     root.mainloop()
\ No newline at end of file
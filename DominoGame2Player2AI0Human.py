@@ -1,218 +1,22 @@
-import random
-from collections import deque
 import tkinter as tk
 from tkinter import messagebox
 # Importing the performance tracker
 from PerformanceMeasure import PerformanceTracker
-import copy
+from DominoEngine import DominoGame, TILES
+from DominoAI import monte_carlo_ai_move
+from DominoMCTS import MCTS
 import pygame
+import sys
 
 """
 Domino game utilizing two Monte Carlo AI opponents.
 
-This class defines the DominoGame logic and a corresponding GUI class
-called DominoGUI to play a dominos game between two AI. This
+This module defines a GUI class called DominoGUI, built on the shared
+DominoGame engine, to play a dominos game between two AI. This
 game specifically utilizes rules from Puerto Rico so it is not a traditional
 domino score based game. The word "player" refers the the AI.
 """
 
-class DominoGame:
-    """
-           Primary game logic for playing a domino game.
-
-          Operations include: creating the domino pieces (tiles), shuffling the tiles, distribution of tiles,
-          verifying if a placed tile is a valid domino piece, allowing players to draw from the stock,
-          passing turns, deciding the winner and looser of the game, and ending the game.
-          The adversarial search utilized for decision-making was the Monte Carlo.
-
-           Attributes:
-               tiles (List[Tuple[int, int]]): All domino tiles in the game.
-               players (List[List[Tuple[int, int]]]): Two players' hands.
-               stock (List[Tuple[int, int]]): Remaining tiles to draw.
-               board (Deque[Tuple[Tuple[int, int], int]]): Placed tiles with their owner index.
-               current_player (int): Index of the player whose turn it is (0 or 1).
-               passes (int): Number of consecutive passes.
-               highest_double (Optional[Tuple[int, int]]): The highest starting double.
-               ai_should_start (bool): Flag indicating if AI plays first.
-               starting_player (int): Index of the player who started.
-           """
-
-    def __init__(self):
-        """
-        Initializes the game by setting up and shuffling the tiles. Then, distributes 7 tiles to both players. The stock
-        takes the rest of the tiles. It also determines the starting player based on the highest double in the original
-        hand. This is a Puerto Rican rule where whoever has the [6|6] piece starts the game.
-        """
-
-        # Creates the domino pieces (tiles) from [0|0] up to [6|6]
-        self.tiles = [(i, j) for i in range(7) for j in range(i, 7)]
-        # Shuffles the tiles
-        random.shuffle(self.tiles)
-        # Gives the player the tiles to play
-        self.players = [self.tiles[:7], self.tiles[7:14]]
-        # Keeps stock of the available tiles
-        self.stock = self.tiles[14:]
-        # Stores (tile, player)
-        self.board = deque()
-        # Checks who's playing
-        self.current_player = 0
-        # Checks who passed
-        self.passes = 0
-        #Finds the highest double piece within the players' hands
-        self.highest_double = None
-        # Flag to trigger AI move at start
-        self.ai_should_start = False
-        # Index of the player who starts the game
-        self.starting_player = 0
-
-        # Determines the starting AI player by "Regla del 6"
-        for n in range(6, -1, -1):
-            if (n, n) in self.players[0]:
-                self.highest_double = (n, n)
-                self.players[0].remove((n, n))
-                self.board.append(((n, n), 0))
-                self.starting_player = 0
-                self.current_player = 1
-                self.ai_should_start = True
-                break
-            elif (n, n) in self.players[1]:
-                self.highest_double = (n, n)
-                self.players[1].remove((n, n))
-                self.board.append(((n, n), 1))
-                self.current_player = 0
-                self.starting_player = 1
-                break
-
-
-
-    def is_valid_move(self, tile, end):
-        """
-        Verifies if a tile can be placed on either end of the board.
-
-        Args:
-            tile (Tuple[int, int]): The domino tile to check.
-            end (int): The number at the board end to match.
-
-        Returns:
-            bool: True if the tile contains the value 'end'.
-        """
-        return end in tile
-
-
-    def get_valid_moves(self, hand):
-        """
-        From the player's hand it highlights the tiles that can be placed on either end of the board.
-        If the board is empty, any tile is valid. Since both players are AI the user will not see their hands.
-
-        Args:
-              hand (List[Tuple[int, int]]): The AI's current hand.
-
-        Returns:
-                List[Tuple[int, int]]: Tiles that can be legally played.
-        """
-        if not self.board:
-            return hand
-        left, right = self.board[0][0][0], self.board[-1][0][1]
-        return [t for t in hand if self.is_valid_move(t, left) or self.is_valid_move(t, right)]
-
-
-    def draw_from_stock(self, player):
-        """
-        Draw a tile from the stock for a player if available.
-
-        Args:
-            player (int): Index of the player drawing (0 or 1).
-
-        Returns:
-            Optional[Tuple[int, int]]: The drawn tile, or None if stock is empty.
-         """
-        if self.stock:
-            drawn_tile = self.stock.pop()
-            self.players[player].append(drawn_tile)
-            return drawn_tile
-        return None
-
-
-    def play_tile(self, player, tile):
-        """
-         Allows to place a player's tile on the board if the move is valid.
-
-         Tiles are oriented correctly to match the board end.
-
-         Args:
-           player (int): Index of the player playing (0 or 1).
-           tile (Tuple[int, int]): The tile to play.
-
-         Raises:
-           ValueError: If the move is invalid.
-         """
-        if not self.board:
-            self.board.append((tile, player))
-        else:
-            left, right = self.board[0][0][0], self.board[-1][0][1]
-            if self.is_valid_move(tile, left):
-                t = tile if tile[1] == left else (tile[1], tile[0])
-                self.board.appendleft((t, player))
-            elif self.is_valid_move(tile, right):
-                t = tile if tile[0] == right else (tile[1], tile[0])
-                self.board.append((t, player))
-            else:
-                raise ValueError("Invalid move")
-        self.players[player].remove(tile)
-        self.passes = 0
-
-
-    def pass_turn(self):
-        """
-        A counter that verifies if the current player has passed their turn.
-        If so, the counter is incremented.
-        """
-        self.passes += 1
-
-
-    def is_game_over(self):
-        """
-        Verifies if the game is over. A game over is triggered when the first player is left without any tiles.
-        Another way to finish the game is if both players consequently pass their turn and not tiles are left in stock.
-
-        Returns:
-            bool: True if the game is over, False otherwise.
-        """
-        return any(len(p) == 0 for p in self.players) or self.passes >= 2
-
-
-    def get_winner(self):
-        """
-         Determines the winner of the game.
-
-         If a player has emptied their hand, they win. Otherwise, the player with
-        the lowest pip count wins; ties return -1.
-
-         Returns:
-            int: Winning player index (0 or 1), or -1 for a tie.
-        """
-
-        # Calculate total pip count for each player
-        player_scores = []
-        for i, hand in enumerate(self.players):
-            total = sum(tile[0] + tile[1] for tile in hand)
-            player_scores.append((i, total))
-
-        # Sort players by score (lowest total wins)
-        player_scores.sort(key=lambda x: x[1])
-
-        # Check for a tie (two or more players with the same lowest score)
-        lowest_score = player_scores[0][1]
-        tied_players = [i for i, score in player_scores if score == lowest_score]
-
-        if len(tied_players) > 1:
-            # Tie
-            return -1
-        else:
-            # Index of the winning player
-            return player_scores[0][0]
-
-
 
 class DominoGUI:
     """
@@ -220,18 +24,23 @@ class DominoGUI:
 
         Provides controls for playing, drawing, passing, and displays game state.
     """
-    def __init__(self, root, tracker):
+    def __init__(self, root, tracker, search="flat"):
         """
          Initializes GUI components, starts music, and kicks off game loop.
 
         Args:
              root (tk.Tk): The main Tkinter window.
+             search (str): AI search passed to monte_carlo_ai_move; "uct" keeps
+                 a search tree per AI across its turns.
         """
         self.root = root
+        self.search = search
         # Tracker added for performance measurement
         self.tracker = PerformanceTracker()
         self.root.title("Domino - AI vs AI (Monte Carlo)")
-        self.game = DominoGame()
+        self.game = DominoGame(2)
+        # Each AI's search tree for search="uct", reused from turn to turn
+        self.trees = [MCTS() for _ in range(2)]
 
         # Frames for Layout
         self.board_frame = tk.Frame(root)
@@ -292,7 +101,7 @@ class DominoGUI:
         for widget in self.board_frame.winfo_children():
             widget.destroy()
 
-        for tile, player in self.game.board:
+        for tile, player in zip(self.game.board, self.game.board_owners):
             #Designates a specific color to each Player.
             color = 'blue' if player == 0 else 'red'
 
@@ -328,11 +137,12 @@ class DominoGUI:
             self.status_label.config(text=f"AI {player} drew a tile")
 
         # Employs the Monte Carlo simulation.
-        move = self.monte_carlo_ai_move(player, simulations=30)
+        move = monte_carlo_ai_move(self.game, player, think_ms=200,
+                                   search=self.search, tree=self.trees[player])
         # Labels that show which player is currently playing and what piece have they played
-        if move:
+        if move is not None:
             self.game.play_tile(player, move)
-            self.status_label.config(text=f"AI {player} played {move}")
+            self.status_label.config(text=f"AI {player} played {TILES[move]}")
         else:
             # Label that presents which player has skipped their turns
             self.game.pass_turn()
@@ -350,63 +160,6 @@ class DominoGUI:
             self.root.after(1500, self.ai_turn)
 
 
-    def monte_carlo_ai_move(self, player, simulations=30):
-        """
-            Evaluate possible moves via Monte Carlo playouts and return best one.
-            Currently, it runs 30 simulations per move.
-
-            Args:
-                simulations (int): Number of random playouts per move.
-
-            Returns:
-                Optional[Tuple[int, int]]: Best tile to play or None to pass.
-            """
-        hand = self.game.players[player]
-        valid_moves = self.game.get_valid_moves(hand)
-        if not valid_moves:
-            return None
-
-        move_scores = {}
-        for move in valid_moves:
-            total_score = 0
-            for _ in range(simulations):
-                sim_game = copy.deepcopy(self.game)
-                try:
-                    sim_game.play_tile(player, move)
-                except ValueError:
-                    continue
-                winner = self.simulate_random_playout(sim_game)
-                total_score += 1 if winner == player else 0
-            move_scores[move] = total_score / simulations
-
-        best_move = max(move_scores, key=move_scores.get)
-        return best_move
-
-
-    def simulate_random_playout(self, sim_game):
-        """
-        Run a random playout until game end to estimate outcome.
-
-        Args:
-            sim_game (DominoGame): Game state copy.
-
-        Returns:
-            int: Winning player index or -1 for tie.
-        """
-        current = 0
-        while not sim_game.is_game_over():
-            hand = sim_game.players[current]
-            valid = sim_game.get_valid_moves(hand)
-            if valid:
-                sim_game.play_tile(current, random.choice(valid))
-            elif sim_game.stock:
-                sim_game.draw_from_stock(current)
-            else:
-                sim_game.pass_turn()
-            current = 1 - current
-        return sim_game.get_winner()
-
-
     def update_ai_tile_count(self):
         """
         Refresh label showing how many tiles AI holds.
@@ -418,7 +171,9 @@ class DominoGUI:
         """
         Initiates a new instance of a domino game.
         """
-        self.game = DominoGame()
+        self.game = DominoGame(2)
+        for tree in self.trees:
+            tree.reset()
 
         # Resets the board display
         for widget in self.board_frame.winfo_children():
@@ -448,7 +203,7 @@ class DominoGUI:
 
         # Prints all players' remaining points
         player_scores = [
-            (i, sum(t[0] + t[1] for t in hand), hand)
+            (i, self.game.pip_totals[i], [TILES[t] for t in hand])
             for i, hand in enumerate(self.game.players)
         ]
         score_lines = "\n".join(
@@ -492,6 +247,8 @@ class DominoGUI:
 
 # Runs the application
 if __name__ == "__main__":
+    # --uct makes each AI grow one search tree over the game
+    search = "uct" if "--uct" in sys.argv else "flat"
     pygame.mixer.init()
     # Copyright free music to set the mood for the game.
     pygame.mixer.music.load("BGM.mp3")
@@ -501,5 +258,5 @@ if __name__ == "__main__":
     tracker = PerformanceTracker()
     root = tk.Tk()
     # Tracker added for performance measurement
-    app = DominoGUI(root, tracker)
+    app = DominoGUI(root, tracker, search)
     root.mainloop()
@@ -1,212 +1,22 @@
-import random
-from collections import deque
 import tkinter as tk
 from tkinter import messagebox
 #importing the performance tracker
 from PerformanceMeasure import PerformanceTracker
-import copy
+from DominoEngine import DominoGame, TILES
+from DominoAI import monte_carlo_ai_move
+from DominoMCTS import MCTS
 import pygame
 import sys
 
 """
 Domino game utilizing Monte Carlo AI opponent
 
-This class defines the DominoGame logic and a corresponding GUI class
-called DominoGUI to play a dominoes game between a human and an AI. This
+This module defines a GUI class called DominoGUI, built on the shared
+DominoGame engine, to play a dominoes game between a human and an AI. This
 game specifically utilizes rules from Puerto Rico so it is not a traditional
 domino score based game.
 """
 
-class DominoGame:
-    """
-            Core game logic for Domino.
-
-            Handles tile creation, shuffling, dealing, move validation, drawing from stock,
-            turn passing, and determining game end and winner. Uses a Monte Carlo
-            approach for AI decision-making.
-
-            Attributes:
-                tiles (List[Tuple[int, int]]): All domino tiles in the game.
-                players (List[List[Tuple[int, int]]]): Two players' hands.
-                stock (List[Tuple[int, int]]): Remaining tiles to draw.
-                board (Deque[Tuple[Tuple[int, int], int]]): Placed tiles with their owner index.
-                current_player (int): Index of the player whose turn it is (0 or 1).
-                passes (int): Number of consecutive passes.
-            """
-
-    def __init__(self, team_mode):
-
-        """
-        Initialize the game by creating, shuffling, and dealing tiles,
-        setting up player hands, stock, board, and determining first player
-        based on the 6|6 tile.
-
-        Args:
-            team_mode (bool): Enable team scoring if True.
-        """
-
-        # Creates the domino pieces (tiles) from [0|0] up to [6|6]
-        self.tiles = [(i, j) for i in range(7) for j in range(i, 7)]
-        # Shuffles the tiles
-        random.shuffle(self.tiles)
-        # Gives the player the tiles to play
-        self.players = [self.tiles[i*7:(i+1)*7] for i in range(4)]
-        # Keeps stock of the available tiles
-        self.stock = self.tiles[28:]
-        # Stores (tile, player)
-        self.board = deque()
-        # To track who placed each tile
-        self.board_owners = deque()
-        # Checks who's playing
-        self.current_player = 0
-        # Checks who passed
-        self.passes = 0
-        self.team_mode = team_mode
-        #Determine starting player with the highest double
-        for i, hand in enumerate(self.players):
-            if (6, 6) in hand:
-                self.current_player = (i + 1) % 4
-                # Removes from hand the tile
-                hand.remove((6, 6))
-                # Place it on the board
-                self.board.append((6, 6))
-                # Track who played it
-                self.board_owners.append(i)
-                break
-
-
-    def is_valid_move(self, tile, end):
-        """
-           Checks if a tile can be placed at one end of the board or the other.
-
-           Args:
-               tile (Tuple[int, int]): The domino tile to check.
-               end (int): The number at the board end to match.
-
-           Returns:
-               bool: True if the tile contains the value 'end'.
-           """
-        return end in tile
-
-    def get_valid_moves(self, hand):
-        """
-               List valid moves for a given hand based on current board ends.
-               If the board is empty, any tile is valid.
-
-               Args:
-                   hand (List[Tuple[int, int]]): The player's current hand.
-
-               Returns:
-                   List[Tuple[int, int]]: Tiles that can be legally played.
-               """
-        if not self.board:
-            return hand
-        left, right = self.board[0][0], self.board[-1][1]
-        return [t for t in hand if self.is_valid_move(t, left) or self.is_valid_move(t, right)]
-
-    def draw_from_stock(self, player):
-        """
-                    Draw a tile from the stock for a player if available.
-
-                    Args:
-                        player (int): Index of the player drawing (0 or 1).
-
-                    Returns:
-                        Optional[Tuple[int, int]]: The drawn tile, or None if stock is empty.
-                        """
-        if self.stock:
-            drawn_tile = self.stock.pop()
-            self.players[player].append(drawn_tile)
-            return drawn_tile
-        return None
-
-    def play_tile(self, player, tile):
-        """
-                     Place a tile on the board for a player if the move is valid.
-
-                    Tiles are oriented correctly to match the board end.
-
-                    Args:
-                        player (int): Index of the player playing (0 or 1).
-                        tile (Tuple[int, int]): The tile to play.
-
-                    Raises:
-                        ValueError: If the move is invalid.
-                    """
-        if not self.board:
-            self.board.append(tile)
-            self.board_owners.append(player)
-        else:
-            left, right = self.board[0][0], self.board[-1][1]
-            if self.is_valid_move(tile, left):
-                self.board.appendleft(tile if tile[1] == left else (tile[1], tile[0]))
-                self.board_owners.appendleft(player)
-            elif self.is_valid_move(tile, right):
-                self.board.append(tile if tile[0] == right else (tile[1], tile[0]))
-                self.board_owners.append(player)
-            else:
-                raise ValueError("Invalid move")
-        self.players[player].remove(tile)
-        self.passes = 0
-
-    def pass_turn(self):
-        """
-                Verifies a pass for the current player, incrementing the pass counter.
-                        """
-        self.passes += 1
-
-    def is_game_over(self):
-        """
-             Check if the game has ended.
-
-            The game ends when a player has no tiles or both players pass consecutively.
-            This was done to avoid infinite looping.
-
-                Returns:
-                    bool: True if the game is over.
-                """
-        return any(len(p) == 0 for p in self.players) or self.passes >= 4
-
-    def get_winner(self):
-        """
-                    Determine the winner of the game.
-
-                    If a player emptied their hand, they win. Otherwise, the player with
-                    the lowest pip count wins; ties return -1.
-
-                    Returns:
-                        int: Winning player index (0 or 1), or -1 for a tie.
-                    """
-        # Calculate total pip count for each player
-        if self.team_mode:
-            team_0_score = sum(tile[0] + tile[1] for i in [0, 2] for tile in self.players[i])
-            team_1_score = sum(tile[0] + tile[1] for i in [1, 3] for tile in self.players[i])
-            if team_0_score < team_1_score:
-                return "Team 1"
-            elif team_1_score < team_0_score:
-                return "Team 2"
-            else:
-                return -1  # Tie
-        else:
-            player_scores = []
-            for i, hand in enumerate(self.players):
-                total = sum(tile[0] + tile[1] for tile in hand)
-                player_scores.append((i, total))
-
-            # Sort players by score (lowest total wins)
-            player_scores.sort(key=lambda x: x[1])
-
-            # Check for a tie (two or more players with the same lowest score)
-            lowest_score = player_scores[0][1]
-            tied_players = [i for i, score in player_scores if score == lowest_score]
-
-            if len(tied_players) > 1:
-                 return -1  # Tie
-            else:
-                # Index of the winning player
-                 return player_scores[0][0]
-
-
 
 class DominoGUI:
     """
@@ -215,7 +25,7 @@ class DominoGUI:
           Provides controls for playing, drawing, passing, and displays game state.
           """
 
-    def __init__(self, root, team_mode, tracker):
+    def __init__(self, root, team_mode, tracker, search="flat"):
         """
                Initialize GUI components, set up game and layout frames,
                and begin game loop after initial placement.
@@ -223,12 +33,17 @@ class DominoGUI:
                Args:
                    root (tk.Tk): Main Tkinter window.
                    team_mode (bool): Enable team scoring visuals.
+                   search (str): AI search passed to monte_carlo_ai_move; "uct"
+                       keeps a search tree per AI across its turns.
                """
         self.root = root
+        self.search = search
         self.root.title("Domino - 4 Players (You vs 3 AI)")
         # Tracker added
         self.tracker = PerformanceTracker()
-        self.game = DominoGame(team_mode)
+        self.game = DominoGame(4, team_mode)
+        # Each AI's search tree for search="uct", reused from turn to turn
+        self.trees = {seat: MCTS() for seat in range(1, 4)}
 
         # Designates team colors for each player
         if team_mode:
@@ -400,7 +215,8 @@ class DominoGUI:
         hand = self.game.players[0]
         valid_moves = self.game.get_valid_moves(hand)
         for tile in hand:
-            tile_str = f"[{tile[0]}|{tile[1]}]"
+            low, high = TILES[tile]
+            tile_str = f"[{low}|{high}]"
             btn = tk.Button(self.hand_frame, text=tile_str, font=('Courier', 12), relief='raised', fg='blue',
                             state=tk.NORMAL if tile in valid_moves else tk.DISABLED,
                             command=lambda t=tile: self.play_tile(t))
@@ -411,7 +227,7 @@ class DominoGUI:
             Handle the human player's play action and update state.
 
             Args:
-                tile (Tuple[int, int]): Tile chosen by player.
+                tile (int): ID of the tile chosen by player.
             """
         try:
             self.game.play_tile(0, tile)
@@ -433,8 +249,8 @@ class DominoGUI:
             Handles human player drawing from stock and update GUI.
             """
         tile = self.game.draw_from_stock(0)
-        if tile:
-            self.status_label.config(text=f"You drew {tile}")
+        if tile is not None:
+            self.status_label.config(text=f"You drew {TILES[tile]}")
         else:
             self.status_label.config(text="Stock is empty")
         self.draw_hand()
@@ -472,10 +288,11 @@ class DominoGUI:
             drawn = self.game.draw_from_stock(cp)
             valid_moves = self.game.get_valid_moves(self.game.players[cp])
 
-        move = self.monte_carlo_ai_move(cp, simulations=25)
-        if move:
+        move = monte_carlo_ai_move(self.game, cp, think_ms=200,
+                                   search=self.search, tree=self.trees[cp])
+        if move is not None:
             self.game.play_tile(cp, move)
-            self.status_label.config(text=f"AI {cp} played {move}")
+            self.status_label.config(text=f"AI {cp} played {TILES[move]}")
         else:
             self.game.pass_turn()
             self.status_label.config(text=f"AI {cp} passed")
@@ -488,61 +305,6 @@ class DominoGUI:
         self.root.after(1000, self.ai_turn)
 
 
-    def monte_carlo_ai_move(self, player_index, simulations=30):
-        """
-            Evaluate possible moves via Monte Carlo playouts and return best one.
-            Currently, it runs 30 simulations per move.
-
-            Args:
-                simulations (int): Number of random playouts per move.
-
-            Returns:
-                Optional[Tuple[int, int]]: Best tile to play or None to pass.
-            """
-        hand = self.game.players[player_index]
-        valid_moves = self.game.get_valid_moves(hand)
-        if not valid_moves:
-            return None
-
-        move_scores = {}
-        for move in valid_moves:
-            total_score = 0
-            for _ in range(simulations):
-                sim_game = copy.deepcopy(self.game)
-                try:
-                    sim_game.play_tile(player_index, move)
-                except:
-                    continue
-                winner = self.simulate_random_playout(sim_game)
-                total_score += 1 if winner == player_index else 0
-            move_scores[move] = total_score / simulations
-
-        best_move = max(move_scores, key=move_scores.get)
-        return best_move
-
-    def simulate_random_playout(self, sim_game):
-        """
-            Run a random playout until game end to estimate outcome.
-
-            Args:
-                sim_game (DominoGame): Game state copy.
-
-            Returns:
-                int: Winning player index or -1 for tie.
-                """
-        current = sim_game.current_player
-        while not sim_game.is_game_over():
-            hand = sim_game.players[current]
-            valid = sim_game.get_valid_moves(hand)
-            if valid:
-                sim_game.play_tile(current, random.choice(valid))
-            elif sim_game.stock:
-                sim_game.draw_from_stock(current)
-            else:
-                sim_game.pass_turn()
-            current = (current + 1) % 4
-        return sim_game.get_winner()
-
     def update_ai_tile_counts(self):
         """
             Refresh label showing how many tiles AI holds.
@@ -556,7 +318,9 @@ class DominoGUI:
         """
         Initiates a new instance of a domino game.
         """
-        self.game = DominoGame(teamMode)
+        self.game = DominoGame(4, teamMode)
+        for tree in self.trees.values():
+            tree.reset()
         self.game_over = False
         self.last_human = None
 
@@ -586,14 +350,13 @@ class DominoGUI:
 
         # Print all players' remaining points
         player_scores = [
-            (i, sum(t[0] + t[1] for t in hand), hand)
+            (i, self.game.pip_totals[i], [TILES[t] for t in hand])
             for i, hand in enumerate(self.game.players)
         ]
 
         if self.game.team_mode:
             # Team-based scoring
-            team_0_score = sum(score for i, score, _ in player_scores if i in [0, 2])
-            team_1_score = sum(score for i, score, _ in player_scores if i in [1, 3])
+            team_0_score, team_1_score = self.game.team_totals()
 
             team_lines = "\n".join(
                 f"Player {i} ({'You' if i ==0  else 'AI'}): {score} points | Tiles: {hand}"
@@ -648,6 +411,8 @@ class DominoGUI:
 
 if __name__ == "__main__":
     team_mode = "--team" in sys.argv
+    # --uct makes each AI grow one search tree over the game
+    search = "uct" if "--uct" in sys.argv else "flat"
     pygame.mixer.init()
     # Copyright free music to set the mood for the game. Just a fun addition.
     pygame.mixer.music.load("BGM.mp3")
@@ -656,5 +421,5 @@ if __name__ == "__main__":
     tracker = PerformanceTracker() #tracker added   
     root = tk.Tk()
    
-    app = DominoGUI(root, team_mode, tracker)
+    app = DominoGUI(root, team_mode, tracker, search)
     root.mainloop()
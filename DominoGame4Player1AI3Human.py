@@ -1,235 +1,22 @@
-import random
-from collections import deque
 import tkinter as tk
 from tkinter import messagebox
 #importing the performance tracker
 from PerformanceMeasure import PerformanceTracker
-import copy
+from DominoEngine import DominoGame, TILES
+from DominoAI import monte_carlo_ai_move
+from DominoMCTS import MCTS
 import pygame
 import sys
 
 """
 Domino game utilizing four Monte Carlo AI opponent
 
-This class defines the DominoGame logic and a corresponding GUI class
-called DominoGUI to play a dominos game between a human and an AI. This
+This module defines a GUI class called DominoGUI, built on the shared
+DominoGame engine, to play a dominos game between a human and an AI. This
 game specifically utilizes rules from Puerto Rico so it is not a traditional
 domino score based game. 
 """
 
-class DominoGame:
-    """
-    A class to model the state and logic of a 4-player domino game.
-
-    The game supports team play (3 humans vs 1 AI) or a free-for-all mode.
-    Tiles are dealt randomly, the game starts with the double-six tile,
-    and players take turns placing valid tiles or drawing from the stock.
-
-    Attributes:
-        team_mode (bool): Whether the game is played in teams.
-        layout (str): Layout string ('p1', 'p2', or 'p3') defining human-AI team configurations.
-        teams (list[list[int]]): A list of two lists indicating player indices per team (only in team mode).
-        tiles (list[tuple[int, int]]): The full shuffled domino tile set.
-        players (list[list[tuple[int, int]]]): A list containing 4 lists of player hands.
-        stock (list[tuple[int, int]]): Remaining tiles not dealt to any player.
-        board (deque[tuple[int, int]]): The current sequence of tiles played on the table.
-        board_owners (deque[int]): Tracks which player placed each tile on the board.
-        current_player (int): Index of the player whose turn it is.
-        passes (int): Consecutive pass counter (used to determine blocked games).
-    """
-    def __init__(self,team_mode,layout):
-        """
-        Initialize the game state, assign teams, shuffle tiles, and determine the starting player.
-
-        Args:
-            team_mode (bool): If True, players are grouped into two teams (3 humans vs 1 AI).
-            layout (str): Determines which human player is teamed with the AI. 
-                          Accepts 'p1', 'p2', or 'p3', meaning:
-                          - 'p1': Player 1 (index 0) + AI (index 3) vs Player 2 + Player 3
-                          - 'p2': Player 2 + AI vs Player 1 + Player 3
-                          - 'p3': Player 3 + AI vs Player 1 + Player 2
-        """
-
-        self.layout = layout
-
-        # define the two teams based on which human pairs with the AI
-        if team_mode:
-            if layout == "p1":
-                # Player 1 (0) + AI (3) vs Player 2 (1)+Player 3 (2)
-                self.teams = [[0, 3], [1, 2]]
-            elif layout == "p2":
-                # Player 2 + AI vs Player 1+Player 3
-                self.teams = [[1, 3], [0, 2]]
-            else:  # "p3"
-                # Player 3 + AI vs Player 1+Player 2
-                self.teams = [[2, 3], [0, 1]]
-        else:
-            # free‑for‑all: no teams
-            self.teams = []
-
-        self.tiles = [(i, j) for i in range(7) for j in range(i, 7)]
-        random.shuffle(self.tiles)
-        # Deal 7 tiles to each of 4 players (players: 0, 1, and 2 = human; 3 = AI)
-        self.players = [self.tiles[i*7:(i+1)*7] for i in range(4)]
-        self.stock = self.tiles[28:]
-        self.board = deque()
-        # To track who placed each tile
-        self.board_owners = deque()  
-        self.current_player = 0
-        self.passes = 0
-        self.team_mode = team_mode
-        # Find the (6,6) to start the game
-        for i, hand in enumerate(self.players):
-            if (6, 6) in hand:
-                self.current_player = (i + 1) % 4
-                # Remove from hand
-                hand.remove((6, 6))
-                # Place it on the board  
-                self.board.append((6, 6)) 
-                # Track who played it 
-                self.board_owners.append(i)  
-                break
-
-    def is_valid_move(self, tile, end):
-        """
-        Check if a tile can be played at a given end of the board.
-        
-        Args:
-            tile (tuple[int, int]): The tile being evaluated.
-            end (int): The open end of the board to match.
-
-        Returns:
-            bool: True if the tile can be played at the specified end.
-        """
-        return end in tile
-
-    def get_valid_moves(self, hand):
-        """
-        Get a list of valid moves for the current player based on their hand and the current board.
-
-        Args:    
-            hand (list[tuple[int, int]]): The player's hand (a list of tiles).
-
-        Returns:
-            list[tuple[int, int]]: List of tiles that are valid moves.
-        """
-        if not self.board:
-            return hand
-        left, right = self.board[0][0], self.board[-1][1]
-        return [t for t in hand if self.is_valid_move(t, left) or self.is_valid_move(t, right)]
-
-    def draw_from_stock(self, player):
-        """
-        Draw a tile from the stock and add it to the player's hand.
-
-        Args:
-            player (int): The index of the player drawing the tile.
-
-        Returns:
-            tuple[int, int] | None: The tile drawn from the stock, or None if the stock is empty.
-        """
-        if self.stock:
-            drawn_tile = self.stock.pop()
-            self.players[player].append(drawn_tile)
-            return drawn_tile
-        return None
-
-    def play_tile(self, player, tile):
-        """
-        Play a tile on the board, ensuring it matches one of the open ends.
-
-        Args:
-            player (int): The index of the player playing the tile.
-            tile (tuple[int, int]): The tile to be played.
-        
-        Raises:
-            ValueError: If the tile is not valid.
-        """
-        if not self.board:
-            self.board.append(tile)
-            self.board_owners.append(player)
-        else:
-            left, right = self.board[0][0], self.board[-1][1]
-            if self.is_valid_move(tile, left):
-                self.board.appendleft(tile if tile[1] == left else (tile[1], tile[0]))
-                self.board_owners.appendleft(player)
-            elif self.is_valid_move(tile, right):
-                self.board.append(tile if tile[0] == right else (tile[1], tile[0]))
-                self.board_owners.append(player)
-            else:
-                raise ValueError("Invalid move")
-        self.players[player].remove(tile)
-        self.passes = 0
-
-    def pass_turn(self):
-        """
-        Increment the pass counter when a player cannot make a valid move.
-        """
-        self.passes += 1
-
-    def is_game_over(self):
-        """
-        Check if the game is over based on the conditions: all players have passed or a player has emptied their hand.
-
-        Returns:
-            bool: True if the game is over, False otherwise.
-        """
-        return any(len(p) == 0 for p in self.players) or self.passes >= 4
-
-    def get_winner(self):
-        """
-        Determine the winner of the game.
-
-        If a player emptied their hand, they win. Otherwise, the player with
-        the lowest pip count wins; ties return -1.
-
-        Returns:
-            int or str: Winning player index (0-3) in free-for-all, or
-                        "Team 1"/"Team 2" in team mode, or -1 for a tie.
-        """
-        # Check if anyone has emptied their hand
-        for i, hand in enumerate(self.players):
-            if len(hand) == 0:
-                # If in team mode, return the winning team based on the player's index
-                if self.team_mode:
-                    if i in self.teams[0]:  
-                        # Player is in team 1
-                        return "Team 1"
-                    else:
-                        # Player is in team 2
-                        return "Team 2"
-                else:
-                    # Player index in free-for-all
-                    return i  
-
-        # No one has emptied their hand, calculate total pip count
-        if self.team_mode:
-            team_0_score = sum(tile[0] + tile[1] for i in [0, 2] for tile in self.players[i])
-            team_1_score = sum(tile[0] + tile[1] for i in [1, 3] for tile in self.players[i])
-            if team_0_score < team_1_score:
-                return "Team 1"
-            elif team_1_score < team_0_score:
-                return "Team 2"
-            else:
-                # Tie
-                return -1  
-        else:
-            player_scores = []
-            for i, hand in enumerate(self.players):
-                total = sum(tile[0] + tile[1] for tile in hand)
-                player_scores.append((i, total))
-
-            player_scores.sort(key=lambda x: x[1])
-            lowest_score = player_scores[0][1]
-            tied_players = [i for i, score in player_scores if score == lowest_score]
-
-            if len(tied_players) > 1:
-                # Tie
-                return -1 
-            else:
-                # Winning player index
-                return player_scores[0][0]  
-            
 # -------------- GUI --------------
 
 class DominoGUI:
@@ -238,7 +25,7 @@ class DominoGUI:
     It handles user interaction, drawing the game board, displaying hands,
     and managing the flow of the game.
     """
-    def __init__(self, root, team_mode, layout, tracker):
+    def __init__(self, root, team_mode, layout, tracker, search="flat"):
         """
         Initializes the game interface, including the setup for the game board,
         player hands, and control buttons.
@@ -248,12 +35,17 @@ class DominoGUI:
             team_mode (bool): Flag indicating whether the game is in team mode.
             layout (str): Defines the player layout for the game.
             tracker (PerformanceTracker): A performance tracker instance.
+            search (str): AI search passed to monte_carlo_ai_move; "uct" keeps a
+                search tree across the AI's turns.
         """
         self.root = root
+        self.search = search
         self.root.title("Domino - 3 Players vs 1 AI (Pass-and-Play)")
         self.tracker = PerformanceTracker() #tracker added
         # initialize game logic with team_mode and layout
-        self.game = DominoGame(team_mode, layout)
+        self.game = DominoGame(4, team_mode, layout)
+        # The AI's search tree for search="uct", reused from turn to turn
+        self.tree = MCTS()
 
         # Color mapping
         if team_mode:
@@ -443,7 +235,8 @@ class DominoGUI:
         valid_moves = self.game.get_valid_moves(hand)
         # Display the complete hand (7 tiles at game start, or remaining tiles)
         for tile in hand:
-            tile_str = f"[{tile[0]}|{tile[1]}]"
+            low, high = TILES[tile]
+            tile_str = f"[{low}|{high}]"
             btn = tk.Button(self.hand_frame, text=tile_str, font=('Courier', 12), relief='raised',
                             fg=self.player_colors[player],
                             state=tk.NORMAL if tile in valid_moves else tk.DISABLED,
@@ -518,7 +311,7 @@ class DominoGUI:
         Handles playing a tile by the current player and updates the game state.
 
         Args:
-            tile (tuple[int, int]): The tile to be played.
+            tile (int): ID of the tile to be played.
 
         Raises:
             Exception: If the tile cannot be played (invalid move), an error message will be shown.
@@ -544,8 +337,8 @@ class DominoGUI:
         Draws a tile for the current player.
         """
         tile = self.game.draw_from_stock(self.game.current_player)
-        if tile:
-            self.status_label.config(text=f"You drew {tile}")
+        if tile is not None:
+            self.status_label.config(text=f"You drew {TILES[tile]}")
         else:
             self.status_label.config(text="Stock is empty")
         self.draw_hand()
@@ -573,10 +366,11 @@ class DominoGUI:
             valid_moves = self.game.get_valid_moves(self.game.players[cp])
 
         # Use monte-carlo simulation for AI move if possible
-        move = self.monte_carlo_ai_move(cp, simulations=25) if valid_moves else None
-        if move:
+        move = monte_carlo_ai_move(self.game, cp, think_ms=200,
+                                   search=self.search, tree=self.tree) if valid_moves else None
+        if move is not None:
             self.game.play_tile(cp, move)
-            self.status_label.config(text=f"AI played {move}")
+            self.status_label.config(text=f"AI played {TILES[move]}")
         else:
             self.game.pass_turn()
             self.status_label.config(text=f"AI passed")
@@ -585,67 +379,6 @@ class DominoGUI:
         self.game.current_player = (self.game.current_player + 1) % 4
         self.root.after(1000, self.after_move)
 
-    def monte_carlo_ai_move(self, player_index, simulations=30):
-        """
-        Uses Monte Carlo simulation to determine the best move for the AI.
-
-        The method simulates multiple games by playing valid moves and scoring them based on how many times 
-        the AI wins in the simulation. It returns the move that maximizes the AI's chances of winning.
-
-        Args:
-            player_index (int): The index of the AI player (3 in a 3v1 setup).
-            simulations (int): The number of simulations to run for move evaluation.
-
-        Returns:
-            tuple: The best move for the AI, or None if no valid move exists.
-        """
-        hand = self.game.players[player_index]
-        valid_moves = self.game.get_valid_moves(hand)
-        if not valid_moves:
-            return None
-
-        move_scores = {}
-        for move in valid_moves:
-            total_score = 0
-            for _ in range(simulations):
-                sim_game = copy.deepcopy(self.game)
-                try:
-                    sim_game.play_tile(player_index, move)
-                except:
-                    continue
-                winner = self.simulate_random_playout(sim_game)
-                total_score += 1 if winner == player_index else 0
-            move_scores[move] = total_score / simulations
-
-        best_move = max(move_scores, key=move_scores.get)
-        return best_move
-
-    def simulate_random_playout(self, sim_game):
-        """
-        Simulates a random playthrough of the game to determine the winner.
-
-        The method plays out the game randomly from the current state by choosing random valid moves for 
-        each player, drawing from the stock when necessary, and passing turns when no valid moves exist.
-
-        Args:
-            sim_game (DominoGame): A deep copy of the current game to simulate.
-
-        Returns:
-            int: The index of the winning player.
-        """
-        current = sim_game.current_player
-        while not sim_game.is_game_over():
-            hand = sim_game.players[current]
-            valid = sim_game.get_valid_moves(hand)
-            if valid:
-                sim_game.play_tile(current, random.choice(valid))
-            elif sim_game.stock:
-                sim_game.draw_from_stock(current)
-            else:
-                sim_game.pass_turn()
-            current = (current + 1) % 4
-        return sim_game.get_winner()
-
     def update_ai_tile_counts(self):
         """
         Updates the label displaying the number of tiles remaining for AI players.
@@ -663,7 +396,8 @@ class DominoGUI:
             teamMode (bool): Flag to indicate whether the game is in team mode.
             layout (str): The layout configuration of players (e.g., "p1", "p2", "p3").
         """
-        self.game = DominoGame(teamMode, layout)
+        self.game = DominoGame(4, teamMode, layout)
+        self.tree.reset()
         self.game_over = False
         self.last_human = None
 
@@ -695,14 +429,13 @@ class DominoGUI:
         """
         winner = self.game.get_winner()
         player_scores = [
-            (i, sum(t[0] + t[1] for t in hand), hand)
+            (i, self.game.pip_totals[i], [TILES[t] for t in hand])
             for i, hand in enumerate(self.game.players)
         ]
 
         if self.game.team_mode:
             # Team-based scoring
-            team_0_score = sum(score for i, score, _ in player_scores if i in [0, 2])
-            team_1_score = sum(score for i, score, _ in player_scores if i in [1, 3])
+            team_0_score, team_1_score = self.game.team_totals()
 
             team_lines = "\n".join(
                 f"Player {i} ({'You' if i in [0, 1, 2] else 'AI'}): {score} points | Tiles: {hand}"
@@ -769,10 +502,16 @@ if __name__ == "__main__":
             "p3: Player 3 + AI vs Players 1&2"
         )
     )
+    parser.add_argument(
+        "--uct",
+        action="store_true",
+        help="Let the AI grow one search tree over the game"
+    )
     args = parser.parse_args()
 
     team_mode = args.team
     layout   = args.layout
+    search = "uct" if args.uct else "flat"
 
     pygame.mixer.init()
     pygame.mixer.music.load("BGM.mp3")
@@ -781,7 +520,7 @@ if __name__ == "__main__":
     root = tk.Tk()
     #tracker added 
     tracker = PerformanceTracker() 
-    app = DominoGUI(root, team_mode, layout, tracker)
+    app = DominoGUI(root, team_mode, layout, tracker, search)
     root.mainloop()
     sys.exit()
 
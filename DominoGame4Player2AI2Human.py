@@ -1,143 +1,27 @@
-import random
-from collections import deque
 import tkinter as tk
 from tkinter import messagebox
 #importing the performance tracker
 from PerformanceMeasure import PerformanceTracker
-import copy
+from DominoEngine import DominoGame, TILES
+from DominoAI import monte_carlo_ai_move
+from DominoMCTS import MCTS
 import pygame
 import sys
 import argparse
 
 
-# -------------- Game Logic --------------
-
-class DominoGame:
-    def __init__(self,team_mode,layout):
-        self.team_mode = team_mode
-        self.layout = layout
-
-        # Defines teams based on layout choice
-        if layout == "ai_pairs":
-            # human 0 + Ai 1 vs human 2 + AI 3
-            self.teams = [[0, 1], [2, 3]]
-        else:
-            # both humans (0,2) vs both AIs (1,3)
-            self.teams = [[0, 2], [1, 3]]
-
-        self.tiles = [(i, j) for i in range(7) for j in range(i, 7)]
-        random.shuffle(self.tiles)
-        # Deal 7 tiles to each of 4 players (players: 0 and 2 = human; 1 and 3 = AI)
-        self.players = [self.tiles[i*7:(i+1)*7] for i in range(4)]
-        self.stock = self.tiles[28:]
-        self.board = deque()
-        self.board_owners = deque()  # To track who placed each tile
-        self.current_player = 0
-        self.passes = 0        
-        # Find the (6,6) to start the game
-        for i, hand in enumerate(self.players):
-            if (6, 6) in hand:
-                self.current_player = (i + 1) % 4
-                hand.remove((6, 6))  # Remove from hand
-                self.board.append((6, 6))  # Place it on the board
-                self.board_owners.append(i)  # Track who played it
-                break
-
-    def is_valid_move(self, tile, end):
-        """Checks if move to be made is valid by cheeking the ends"""
-        return end in tile
-
-    def get_valid_moves(self, hand):
-        '''
-
-        :param hand: Hand the player(human or AI) has
-        :return: All valid moves that can be made by the player hand at the moment of turn.
-        '''
-        if not self.board:
-            return hand
-        left, right = self.board[0][0], self.board[-1][1]
-        return [t for t in hand if self.is_valid_move(t, left) or self.is_valid_move(t, right)]
-
-    def draw_from_stock(self, player):
-        '''
-        Draws from left over pieces if there are any.
-        :param player: current player drawing.
-        :return: drawn tile that player didn't have.
-        '''
-        if self.stock:
-            drawn_tile = self.stock.pop()
-            self.players[player].append(drawn_tile)
-            return drawn_tile
-        return None
-
-    def play_tile(self, player, tile):
-        '''
-        Places a tile on the board for current acting player.
-        first checks one side then the other if it's valid to put on the board.
-        :param player: current player putting on board.
-        :param tile: tile being placed on the board.
-
-        '''
-        if not self.board:
-            self.board.append(tile)
-            self.board_owners.append(player)
-        else:
-            left, right = self.board[0][0], self.board[-1][1]
-            if self.is_valid_move(tile, left):
-                self.board.appendleft(tile if tile[1] == left else (tile[1], tile[0]))
-                self.board_owners.appendleft(player)
-            elif self.is_valid_move(tile, right):
-                self.board.append(tile if tile[0] == right else (tile[1], tile[0]))
-                self.board_owners.append(player)
-            else:
-                raise ValueError("Invalid move")
-        self.players[player].remove(tile)
-        self.passes = 0
-
-    def pass_turn(self):
-        self.passes += 1
-
-    def is_game_over(self):
-        return any(len(p) == 0 for p in self.players) or self.passes >= 4
-
-    def get_winner(self):
-        '''
-        Adds up all the scores for the game.
-        If its in teams adds the scores for the teams together, if not individual scores to determine
-        second place onwards.
-
-        '''
-        if not self.team_mode:
-            # Free-for-all winner: lowest pip count
-            player_scores = [(i, sum(tile[0] + tile[1] for tile in hand)) for i, hand in enumerate(self.players)]
-            player_scores.sort(key=lambda x: x[1])
-            lowest_score = player_scores[0][1]
-            tied_players = [i for i, score in player_scores if score == lowest_score]
-            return -1 if len(tied_players) > 1 else player_scores[0][0]
-        else:
-            team_scores = []
-            for team in self.teams:
-                total = sum(tile[0] + tile[1]
-                            for player in team
-                            for tile in self.players[player])
-                team_scores.append(total)
-
-            if team_scores[0] < team_scores[1]:
-                return "Team 1"
-            elif team_scores[1] < team_scores[0]:
-                return "Team 2"
-            else:
-                return -1  # tie
-
 # -------------- GUI --------------
 
 class DominoGUI:
-    def __init__(self, root, team_mode, layout, tracker):
+    def __init__(self, root, team_mode, layout, tracker, search="flat"):
         self.root = root
+        self.search = search
         self.root.title("Domino - 2 Players vs 2 AI (Pass-and-Play)")
         self.tracker = PerformanceTracker() #tracker added
         # initialize game logic with both flags
-        self.game = DominoGame(team_mode, layout)
+        self.game = DominoGame(4, team_mode, layout)
+        # Each AI's search tree for search="uct", reused from turn to turn
+        self.trees = {seat: MCTS() for seat in (1, 3)}
 
         # ─── Color mapping ───────────────────────────────────────────────
         if self.game.team_mode:
@@ -327,7 +211,8 @@ class DominoGUI:
         valid_moves = self.game.get_valid_moves(hand)
         # Display the complete hand (7 tiles at game start, or remaining tiles)
         for tile in hand:
-            tile_str = f"[{tile[0]}|{tile[1]}]"
+            low, high = TILES[tile]
+            tile_str = f"[{low}|{high}]"
             btn = tk.Button(self.hand_frame, text=tile_str, font=('Courier', 12), relief='raised',
                             fg=self.player_colors[player],
                             state=tk.NORMAL if tile in valid_moves else tk.DISABLED,
@@ -405,8 +290,8 @@ class DominoGUI:
 
     def draw_tile(self):
         tile = self.game.draw_from_stock(self.game.current_player)
-        if tile:
-            self.status_label.config(text=f"You drew {tile}")
+        if tile is not None:
+            self.status_label.config(text=f"You drew {TILES[tile]}")
         else:
             self.status_label.config(text="Stock is empty")
         self.draw_hand()
@@ -430,11 +315,12 @@ class DominoGUI:
             valid_moves = self.game.get_valid_moves(self.game.players[cp])
 
         # Use monte-carlo simulation for AI move if possible
-        move = self.monte_carlo_ai_move(cp, simulations=25) if valid_moves else None
-        if move:
+        move = monte_carlo_ai_move(self.game, cp, think_ms=200,
+                                   search=self.search, tree=self.trees[cp]) if valid_moves else None
+        if move is not None:
             #plays the move made by monte_carlo simulation if possible for current AI player
             self.game.play_tile(cp, move)
-            self.status_label.config(text=f"AI {1 if cp==1 else 2} played {move}")
+            self.status_label.config(text=f"AI {1 if cp==1 else 2} played {TILES[move]}")
         else:
             self.game.pass_turn()
             self.status_label.config(text=f"AI {1 if cp==1 else 2} passed")
@@ -443,55 +329,6 @@ class DominoGUI:
         self.game.current_player = (self.game.current_player + 1) % 4
         self.root.after(1000, self.after_move)
 
-    def monte_carlo_ai_move(self, player_index, simulations=30):
-        '''
-        Makes the simulations for all possible moves.
-        :param player_index: current AI player using the simulation
-        :param simulations: times to run monte_carlo simulations
-        :return: best possible move found.
-        '''
-        hand = self.game.players[player_index]
-        valid_moves = self.game.get_valid_moves(hand)
-        if not valid_moves:
-            return None
-
-        move_scores = {}
-        #makes a simulation for all valid moves.
-        for move in valid_moves:
-            total_score = 0
-            for _ in range(simulations):
-                sim_game = copy.deepcopy(self.game)
-                try:
-                    sim_game.play_tile(player_index, move)
-                except:
-                    continue
-                winner = self.simulate_random_playout(sim_game)
-                #if winner in the simulated game is the AI agent move gets a point
-                total_score += 1 if winner == player_index else 0
-            move_scores[move] = total_score / simulations
-        #chooses best move based on currently applicable moves
-        best_move = max(move_scores, key=move_scores.get)
-        return best_move
-
-    def simulate_random_playout(self, sim_game):
-        '''
-        Simulates a random outcome for the current game and simulates what the highest score play would be
-        :param sim_game: recreation of current game state to be simulated.
-        :return: winner of simulated game.
-        '''
-        current = sim_game.current_player
-        while not sim_game.is_game_over():
-            hand = sim_game.players[current]
-            valid = sim_game.get_valid_moves(hand)
-            if valid:
-                sim_game.play_tile(current, random.choice(valid))
-            elif sim_game.stock:
-                sim_game.draw_from_stock(current)
-            else:
-                sim_game.pass_turn()
-            current = (current + 1) % 4
-        return sim_game.get_winner()
-
     def update_ai_tile_counts(self):
         # Update labels for AI 1 (index 1) and AI 2 (index 3)
         self.ai_labels[0].config(text=f"AI 1 has {len(self.game.players[1])} tiles")
@@ -501,7 +338,9 @@ class DominoGUI:
     Starts a new game.
     '''
     def start_new_game(self,teamMode, layout):
-        self.game = DominoGame(teamMode, layout)
+        self.game = DominoGame(4, teamMode, layout)
+        for tree in self.trees.values():
+            tree.reset()
         self.game_over = False
         self.last_human = None
 
@@ -531,20 +370,19 @@ class DominoGUI:
         # Optional: Print all players' remaining points
         
         player_scores = [
-            (i, sum(t[0] + t[1] for t in hand), hand)
+            (i, self.game.pip_totals[i], [TILES[t] for t in hand])
             for i, hand in enumerate(self.game.players)
         ]
         if self.game.team_mode:
             # Team-based scoring
-            team_0_score = sum(score for i, score, _ in player_scores if i in [0, 2])
-            team_1_score = sum(score for i, score, _ in player_scores if i in [1, 3])
+            team_0_score, team_1_score = self.game.team_totals()
 
             team_lines = "\n".join(
                 f"Player {i} ({'You' if i in [0, 1, 2] else 'AI'}): {score} points | Tiles: {hand}"
                 for i, score, hand in player_scores
             )
             msg = "🤝 It's a tie!" if winner == -1 else f"🎉 {winner} wins!"
-            msg += f"\n\nTeam 0 & 2 score: {team_0_score}\nTeam 1 & 3 score: {team_1_score}"
+            msg += f"\n\nTeam 1 score: {team_0_score}\nTeam 2 score: {team_1_score}"
             msg += "\n\nFinal Player Scores:\n" + team_lines
 
             messagebox.showinfo("Game Over", msg)
@@ -600,10 +438,16 @@ if __name__ == "__main__":
             "humans_team: both humans vs both AIs"
         )
     )
+    parser.add_argument(
+        "--uct",
+        action="store_true",
+        help="Let each AI grow one search tree over the game"
+    )
     args = parser.parse_args()
 
     team_mode = args.team
     layout   = args.layout
+    search = "uct" if args.uct else "flat"
 
     pygame.mixer.init()
     pygame.mixer.music.load("BGM.mp3")
@@ -612,6 +456,6 @@ if __name__ == "__main__":
     tracker = PerformanceTracker() #tracker added   
     root = tk.Tk()
     # pass both flags into your GUI
-    app = DominoGUI(root, team_mode, layout, tracker)
+    app = DominoGUI(root, team_mode, layout, tracker, search)
     root.mainloop()
     sys.exit()
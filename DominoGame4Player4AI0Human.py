@@ -1,203 +1,25 @@
-import random
-from collections import deque
-import tkinter as tk
-from tkinter import messagebox
 #importing the performance tracker
 from PerformanceMeasure import PerformanceTracker
-import copy
-import pygame
+from DominoEngine import DominoGame, TILES
+from DominoWorkerPool import WorkerPool
 import sys
+if __name__ == "__main__":
+    # AI pool workers import this script as __mp_main__; only the window needs these
+    import tkinter as tk
+    from tkinter import messagebox
+    import pygame
+    from DominoMCTS import MCTS
 
 """
 Domino game utilizing four Monte Carlo AI opponent
 
-This class defines the DominoGame logic and a corresponding GUI class
-called DominoGUI to play a dominos game between four AI. This
+This module defines a GUI class called DominoGUI, built on the shared
+DominoGame engine, to play a dominos game between four AI. This
 game specifically utilizes rules from Puerto Rico so it is not a traditional
 domino score based game. The word "player" refers the the AI.
 """
 
 
-class DominoGame:
-    """
-      Primary game logic for playing a domino game.
-
-     Operations include: creating the domino pieces (tiles), shuffling the tiles, distribution of tiles,
-     verifying if a placed tile is a valid domino piece, allowing players to draw from the stock,
-     passing turns, deciding the winner and looser of the game, and ending the game.
-     The adversarial search utilized for decision-making was the Monte Carlo.
-
-      Attributes:
-          tiles (List[Tuple[int, int]]): All domino tiles in the game.
-          players (List[List[Tuple[int, int]]]): Two players' hands.
-          stock (List[Tuple[int, int]]): Remaining tiles to draw.
-          board (Deque[Tuple[Tuple[int, int], int]]): Placed tiles with their owner index.
-          current_player (int): Index of the player whose turn it is (0 or 1).
-          passes (int): Number of consecutive passes.
-     """
-    def __init__(self,team_mode):
-
-        """
-       Initializes the game by setting up and shuffling the tiles. Then, distributes 7 tiles to each player. The stock
-        takes the rest of the tiles. It also determines the starting player based on the highest double in the original
-        hand. This is a Puerto Rican rule where whoever has the [6|6] piece starts the game.
-
-       Args:
-           team_mode (bool): Enable team scoring if True.
-       """
-
-        # Creates the domino pieces (tiles) from [0|0] up to [6|6]
-        self.tiles = [(i, j) for i in range(7) for j in range(i, 7)]
-        # Shuffles the tiles
-        random.shuffle(self.tiles)
-        # Gives the player the tiles to play
-        self.players = [self.tiles[i*7:(i+1)*7] for i in range(4)]
-        # Keeps stock of the available tiles
-        self.stock = self.tiles[28:]
-        # Stores (tile, player)
-        self.board = deque()
-        # To track who placed each tile
-        self.board_owners = deque()
-        # Checks who's playing
-        self.current_player = 0
-        # Checks who passed
-        self.passes = 0
-        # Activates team mode
-        self.team_mode = team_mode
-        # Determine starting player with the highest double
-        for i, hand in enumerate(self.players):
-            if (6, 6) in hand:
-                self.current_player = (i + 1) % 4
-                # Removes from hand the tile
-                hand.remove((6, 6))
-                # Places tile on the board
-                self.board.append((6, 6))
-                # Track who played said tile
-                self.board_owners.append(i)
-                break
-
-
-    def is_valid_move(self, tile, end):
-        """
-       Verifies if a tile can be placed on either end of the board.
-
-       Args:
-          tile (Tuple[int, int]): The domino tile to check.
-          end (int): The number at the board end to match.
-
-       Returns:
-          bool: True if the tile contains the value 'end'.
-       """
-        return end in tile
-
-    def get_valid_moves(self, hand):
-        """
-           From the player's hand it highlights the tiles that can be placed on either end of the board.
-        If the board is empty, any tile is valid. Since both players are AI the user will not see their hands.
-
-          Args:
-              hand (List[Tuple[int, int]]): The player's current hand.
-
-          Returns:
-              List[Tuple[int, int]]: Tiles that can be legally played.
-          """
-        if not self.board:
-            return hand
-        left, right = self.board[0][0], self.board[-1][1]
-        return [t for t in hand if self.is_valid_move(t, left) or self.is_valid_move(t, right)]
-
-    def draw_from_stock(self, player):
-        """
-        Draw a tile from the stock for a player if available.
-
-        Args:
-            player (int): Index of the player drawing (0 or 1).
-
-        Returns:
-            Optional[Tuple[int, int]]: The drawn tile, or None if stock is empty.
-        """
-        if self.stock:
-            drawn_tile = self.stock.pop()
-            self.players[player].append(drawn_tile)
-            return drawn_tile
-        return None
-
-    def play_tile(self, player, tile):
-        """
-         Allows to place a player's tile on the board if the move is valid.
-
-         Tiles are oriented correctly to match the board end.
-
-         Args:
-           player (int): Index of the player playing (0 or 1).
-           tile (Tuple[int, int]): The tile to play.
-
-         Raises:
-           ValueError: If the move is invalid.
-        """
-        if not self.board:
-            self.board.append(tile)
-            self.board_owners.append(player)
-        else:
-            left, right = self.board[0][0], self.board[-1][1]
-            if self.is_valid_move(tile, left):
-                self.board.appendleft(tile if tile[1] == left else (tile[1], tile[0]))
-                self.board_owners.appendleft(player)
-            elif self.is_valid_move(tile, right):
-                self.board.append(tile if tile[0] == right else (tile[1], tile[0]))
-                self.board_owners.append(player)
-            else:
-                raise ValueError("Invalid move")
-        self.players[player].remove(tile)
-        self.passes = 0
-
-    def pass_turn(self):
-        """
-        A counter that verifies if the current player has passed their turn.
-        If so, the counter is incremented.
-        """
-        self.passes += 1
-
-    def is_game_over(self):
-        """
-        Verifies if the game is over. A game over is triggered when the first player is left without any tiles.
-        Another way to finish the game is if all players consequently pass their turn and not tiles are left in stock.
-
-        Returns:
-            bool: True if the game is over, False otherwise.
-        """
-        return any(len(p) == 0 for p in self.players) or self.passes >= 4
-
-    def get_winner(self):
-        """
-               Determines the winner of the game.
-
-               If a player has emptied their hand, they win. Otherwise, the player with
-              the lowest pip count wins; ties return -1.
-
-               Returns:
-                  int: Winning player index (0 or 1), or -1 for a tie.
-              """
-        # Calculate total pip count for each player
-        if not self.team_mode:
-            # Free-for-all winner
-            player_scores = [(i, sum(tile[0] + tile[1] for tile in hand)) for i, hand in enumerate(self.players)]
-            player_scores.sort(key=lambda x: x[1])
-            lowest_score = player_scores[0][1]
-            tied_players = [i for i, score in player_scores if score == lowest_score]
-            return -1 if len(tied_players) > 1 else player_scores[0][0]
-        else:
-            # Team mode: the teams are (0,2) vs (1,3)
-            team0 = sum(a + b for i in (0, 2) for a, b in self.players[i])
-            team1 = sum(a + b for i in (1, 3) for a, b in self.players[i])
-            if team0 < team1:
-                return "Team 1"
-            elif team1 < team0:
-                return "Team 2"
-            else:
-                return -1
-
-
 
 class DominoGUI:
     """
@@ -205,7 +27,7 @@ class DominoGUI:
 
       Provides controls for playing, drawing, passing, and displays game state.
       """
-    def __init__(self, root,team_mode, tracker):
+    def __init__(self, root,team_mode, tracker, pool=None, search="flat"):
         """
           Initialize GUI components, set up game and layout frames,
           and begin game loop after initial placement.
@@ -213,10 +35,18 @@ class DominoGUI:
           Args:
               root (tk.Tk): Main Tkinter window.
               team_mode (bool): Enable team scoring visuals.
+              pool (WorkerPool | None): Worker pool shared by all four AI seats for
+                  the whole session; None makes every decision in this process.
+              search (str): AI search passed to monte_carlo_ai_move; "uct" keeps a
+                  search tree per AI across its turns, grown in this process.
           """
         self.root = root
+        self.search = search
         self.root.title("Domino - 4 AI Players")
-        self.game = DominoGame(team_mode)
+        self.game = DominoGame(4, team_mode)
+        self.pool = pool if pool is not None else WorkerPool(0)
+        # Each AI's search tree for search="uct", reused from turn to turn
+        self.trees = [MCTS() for _ in range(4)]
         # Tracker added for performance measurement
         self.tracker = PerformanceTracker()
 
@@ -409,9 +239,10 @@ class DominoGUI:
 
         # Player can either play a tile or pass thier turn
         if valid:
-            move = self.monte_carlo_ai_move(ai_index)
+            move = self.pool.best_move(self.game, ai_index, think_ms=200,
+                                       search=self.search, tree=self.trees[ai_index])
             self.game.play_tile(ai_index, move)
-            self.status_label.config(text=f"AI {ai_index} played {move}")
+            self.status_label.config(text=f"AI {ai_index} played {TILES[move]}")
         else:
             self.game.pass_turn()
             self.status_label.config(text=f"AI {ai_index} passed")
@@ -427,61 +258,6 @@ class DominoGUI:
         else:
             self.root.after(500, self.ai_turn)
 
-    def monte_carlo_ai_move(self, player_index, simulations=30):
-        """
-           Evaluate possible moves via Monte Carlo playouts and return best one.
-           Currently, it runs 30 simulations per move.
-
-           Args:
-               simulations (int): Number of random playouts per move.
-
-           Returns:
-               Optional[Tuple[int, int]]: Best tile to play or None to pass.
-           """
-        hand = self.game.players[player_index]
-        valid_moves = self.game.get_valid_moves(hand)
-        if not valid_moves:
-            return None
-
-        move_scores = {}
-        for move in valid_moves:
-            total_score = 0
-            for _ in range(simulations):
-                sim_game = copy.deepcopy(self.game)
-                try:
-                    sim_game.play_tile(player_index, move)
-                except:
-                    continue
-                winner = self.simulate_random_playout(sim_game)
-                total_score += 1 if winner == player_index else 0
-            move_scores[move] = total_score / simulations
-
-        best_move = max(move_scores, key=move_scores.get)
-        return best_move
-
-    def simulate_random_playout(self, sim_game):
-        """
-        Run a random playout until game end to estimate outcome.
-
-        Args:
-            sim_game (DominoGame): Game state copy.
-
-        Returns:
-            int: Winning player index or -1 for tie.
-        """
-        current = sim_game.current_player
-        while not sim_game.is_game_over():
-            hand = sim_game.players[current]
-            valid = sim_game.get_valid_moves(hand)
-            if valid:
-                sim_game.play_tile(current, random.choice(valid))
-            elif sim_game.stock:
-                sim_game.draw_from_stock(current)
-            else:
-                sim_game.pass_turn()
-            current = (current + 1) % 4
-        return sim_game.get_winner()
-
     def update_ai_tile_counts(self):
         """
             Refresh label showing how many tiles AI holds.
@@ -496,7 +272,9 @@ class DominoGUI:
         """
 
         # Re-starts the game state
-        self.game = DominoGame(self.game.team_mode)
+        self.game = DominoGame(4, self.game.team_mode)
+        for tree in self.trees:
+            tree.reset()
         self.game_over = False
 
         # Clear and redraws the board
@@ -524,14 +302,13 @@ class DominoGUI:
 
         # Print all players' remaining points
         player_scores = [
-            (i, sum(t[0] + t[1] for t in hand), hand)
+            (i, self.game.pip_totals[i], [TILES[t] for t in hand])
             for i, hand in enumerate(self.game.players)
         ]
 
         if self.game.team_mode:
             # Team-based scoring
-            team_0_score = sum(score for i, score, _ in player_scores if i in [0, 2])
-            team_1_score = sum(score for i, score, _ in player_scores if i in [1, 3])
+            team_0_score, team_1_score = self.game.team_totals()
 
             if winner == -1:
                 msg = "🤝 It's a tie between both teams!"
@@ -548,7 +325,7 @@ class DominoGUI:
             else:
                 msg = f"🤖 AI {winner} wins!"
                 # Compute each teams scores.
-                scores = [sum(a + b for a, b in hand) for hand in self.game.players]
+                scores = self.game.pip_totals
                 if self.game.team_mode:
                     # Display's both teams scores
                     t0 = scores[0] + scores[2]
@@ -580,6 +357,14 @@ class DominoGUI:
 
 if __name__ == "__main__":
     team_mode = "--team" in sys.argv
+    # --uct makes each AI grow one search tree over the game
+    search = "uct" if "--uct" in sys.argv else "flat"
+    # Worker processes for the AI, e.g. --workers 8; 0 keeps the AI in this process
+    workers = None
+    if "--workers" in sys.argv:
+        workers = int(sys.argv[sys.argv.index("--workers") + 1])
+    # One pool for the whole session: it survives new games and serves every AI seat
+    pool = WorkerPool(workers)
     pygame.mixer.init()
     pygame.mixer.music.load("BGM.mp3")
     pygame.mixer.music.play(-1)
@@ -587,5 +372,6 @@ if __name__ == "__main__":
     tracker = PerformanceTracker() #tracker added   
     root = tk.Tk()
    
-    app = DominoGUI(root, team_mode, tracker)
+    app = DominoGUI(root, team_mode, tracker, pool, search)
     root.mainloop()
+    pool.shutdown()
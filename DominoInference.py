@@ -0,0 +1,240 @@
+"""
+Hidden-hand inference for the information-set AI.
+
+A player who draws or passes has no tile showing either open pip at that moment.
+InferenceTracker turns the moves of a game into such facts about every other
+seat, and its sample() method deals determinizations that respect them, for use
+as the sampler of DominoMCTS.ISMCTS:
+
+    tracker = InferenceTracker(game, observer=1)
+    token = game.apply(move)
+    tracker.observe(token)
+    move = monte_carlo_ai_move(game, 1, think_ms=200, search="ismcts",
+                               sampler=tracker.sample)
+
+The GUIs move with play_tile, draw_from_stock and pass_turn instead of apply,
+so they call tracker.record(...) with the open ends from before each move
+(see DominoGame2Player.record_move).
+
+The facts assume every player follows the rule the AI seats follow: draw only
+without a playable tile, and pass only once the stock is empty as well. A seat
+that breaks it (a human who draws on purpose, say) is detected when it plays a
+tile it was thought not to hold, and its facts are dropped.
+"""
+
+from DominoEngine import PASS, DRAW, TILES, TILE_BIT, PIP_MASK, FULL_MASK, iter_bits, random_bit
+from DominoMCTS import redeal, determinize
+
+# Constrained groups above which sample() stops checking Hall's condition on
+# every pick; each check looks at 2 ** groups subsets
+HALL_LIMIT = 10
+
+
+def allowed_tiles(forbidden):
+    """
+    Return the tiles that show none of a set of pips.
+
+    Args:
+        forbidden (int): Bitmask of pip values (bit p for pip p).
+
+    Returns:
+        int: Mask of the tiles without any of those pips.
+    """
+    mask = FULL_MASK
+    for pip in iter_bits(forbidden):
+        mask &= ~PIP_MASK[pip]
+    return mask
+
+
+def hall_feasible(groups, remaining):
+    """
+    Check that every group can still get its tiles from the remaining ones.
+
+    By Hall's theorem this holds when every set of groups together can reach at
+    least as many remaining tiles as they need.
+
+    Args:
+        groups (list[list[int]]): [allowed mask, tiles still needed] per group.
+        remaining (int): Mask of the tiles not dealt yet.
+
+    Returns:
+        bool: True if the groups can all be filled.
+    """
+    # Quick pass: groups that can each reach all the tiles every group needs
+    # cannot violate the condition
+    total = sum(need for _, need in groups)
+    if all((allowed & remaining).bit_count() >= total for allowed, _ in groups):
+        return True
+    count = len(groups)
+    unions = [0] * (1 << count)
+    needs = [0] * (1 << count)
+    for subset in range(1, 1 << count):
+        low = subset & -subset
+        allowed, need = groups[low.bit_length() - 1]
+        unions[subset] = unions[subset ^ low] | allowed
+        needs[subset] = needs[subset ^ low] + need
+        if (unions[subset] & remaining).bit_count() < needs[subset]:
+            return False
+    return True
+
+
+class InferenceTracker:
+    """
+    What one seat can infer about the hidden hands from the moves so far.
+
+    Every other seat's hand is split into groups by when the tiles arrived. Each
+    draw or pass forbids the open pips for all tiles the seat holds at that
+    moment, so older groups carry every constraint of newer ones plus their own.
+    A played tile is taken from the oldest group that may hold it, which keeps
+    the facts true whichever group it really came from.
+
+    Attributes:
+        observer (int): Seat doing the inferring; its own hand is known.
+        hand_sizes (list[int]): Number of tiles in every seat's hand.
+        groups (list[list[list[int]]]): Per seat, [forbidden pips, tile count]
+            groups from oldest to newest. Empty for the observer.
+    """
+
+    def __init__(self, game, observer):
+        """
+        Start tracking from a game position, with nothing inferred yet.
+
+        Args:
+            game (DominoGame): The live game. It is not modified.
+            observer (int): Seat doing the inferring.
+        """
+        self.observer = observer
+        self.hand_sizes = [mask.bit_count() for mask in game.hand_masks]
+        self.groups = [[] if seat == observer else [[0, size]]
+                       for seat, size in enumerate(self.hand_sizes)]
+
+    def forbidden_pips(self, seat):
+        """
+        Return the pips a seat is known not to hold.
+
+        Args:
+            seat (int): Index of a player.
+
+        Returns:
+            list[int]: Pip values none of the seat's tiles show.
+        """
+        known = -1
+        for forbidden, count in self.groups[seat]:
+            if count:
+                known &= forbidden
+        return list(iter_bits(known)) if known != -1 else []
+
+    def observe(self, token):
+        """
+        Record a move from the undo token DominoGame.apply returned for it.
+
+        Args:
+            token (tuple): Token returned by DominoGame.apply.
+        """
+        move, player, _, _, left, right = token[:6]
+        self.record(move, player, left, right)
+
+    def record(self, move, player, left, right):
+        """
+        Record a move.
+
+        Args:
+            move (int | str): ID of the played tile, PASS or DRAW.
+            player (int): Seat that moved.
+            left (int): Open pip on the left end before the move, or -1.
+            right (int): Open pip on the right end before the move, or -1.
+        """
+        groups = self.groups[player]
+        if move == DRAW or move == PASS:
+            if left >= 0 and player != self.observer:
+                ends = 1 << left | 1 << right
+                for group in groups:
+                    group[0] |= ends
+            if move == DRAW:
+                self.hand_sizes[player] += 1
+                if player != self.observer:
+                    groups.append([0, 1])
+            return
+
+        self.hand_sizes[player] -= 1
+        if player == self.observer:
+            return
+        a, b = TILES[move]
+        shown = 1 << a | 1 << b
+        for group in groups:
+            if group[1] and not group[0] & shown:
+                group[1] -= 1
+                break
+        else:
+            # The seat held a tile its moves said it could not have: drop its facts
+            self.groups[player] = [[0, self.hand_sizes[player]]]
+            return
+        self.groups[player] = [group for group in groups if group[1]]
+
+    def sample(self, state, observer, rng):
+        """
+        Deal a determinization consistent with everything inferred so far.
+
+        Constrained groups are filled first, the most constrained first, each
+        drawing uniformly from the tiles it may hold. Every pick is checked against
+        Hall's condition for the groups still to be filled, so the deal never
+        runs into a dead end and never has to start over. The unconstrained part
+        of every hand and the stock share the rest at random. If the position does
+        not match the facts, an unconstrained determinization is dealt instead.
+
+        Args:
+            state (SimState): The true position. It is not modified.
+            observer (int): Seat whose information set is sampled; must be the
+                tracker's observer.
+            rng (random.Random): Source of randomness.
+
+        Returns:
+            SimState: A position consistent with the observer's information.
+        """
+        unseen = sum(TILE_BIT[tile] for tile in state.stock)
+        free = [0] * state.num_players
+        pending = []
+        for seat, hand in enumerate(state.hands):
+            if seat == observer:
+                continue
+            unseen |= hand
+            if sum(count for _, count in self.groups[seat]) != hand.bit_count():
+                return determinize(state, observer, rng)
+            for forbidden, count in self.groups[seat]:
+                if forbidden:
+                    pending.append([allowed_tiles(forbidden), count, seat])
+                else:
+                    free[seat] += count
+        groups = [[allowed & unseen, count] for allowed, count, _ in pending]
+        if not hall_feasible(groups, unseen):
+            return determinize(state, observer, rng)
+
+        order = sorted(range(len(pending)), key=lambda j: groups[j][0].bit_count())
+        groups = [groups[j] for j in order]
+        seats = [pending[j][2] for j in order]
+        check = len(groups) <= HALL_LIMIT
+        hands = [0] * state.num_players
+        hands[observer] = state.hands[observer]
+        remaining = unseen
+        for j, group in enumerate(groups):
+            while group[1]:
+                group[1] -= 1
+                # Without the checks (above HALL_LIMIT) a group can run dry; its
+                # constraint is then ignored for the rest of its tiles
+                candidates = group[0] & remaining or remaining
+                later = groups[j:] if check and j + 1 < len(groups) else None
+                while True:
+                    bit = TILE_BIT[random_bit(candidates, rng)]
+                    if later is None or hall_feasible(later, remaining ^ bit):
+                        break
+                    candidates ^= bit
+                hands[seats[j]] |= bit
+                remaining ^= bit
+
+        rest = list(iter_bits(remaining))
+        rng.shuffle(rest)
+        start = 0
+        for seat, count in enumerate(free):
+            hands[seat] |= sum(TILE_BIT[tile] for tile in rest[start:start + count])
+            start += count
+        return redeal(state, hands, rest[start:])
@@ -0,0 +1,602 @@
+"""
+UCT Monte Carlo tree search for the domino AI.
+
+Unlike monte_carlo_ai_move, which scores the candidate tiles with one ply of
+choice and random playouts, MCTS grows a game tree over every seat's decisions.
+Each iteration walks down the tree with the UCT rule, expands one leaf, finishes
+the game with a SimState random playout and adds the result to every node on the
+path, counted for the player who made the move into that node. In team mode a
+win counts for both members of the winning team.
+
+The search sees every hand and the stock order, like the flat Monte Carlo AI.
+Forced actions are folded into the tree: a player without a playable tile draws
+until one fits, and once the stock is empty the only child is a pass.
+
+Nodes live in typed arrays (see MCTS), and an MCTS object keeps its tree between
+decisions. When it is asked about a position that is already in the tree, for
+example after the other players moved, that node's subtree becomes the new root
+and its statistics are kept.
+"""
+
+import math
+import time
+from array import array
+from DominoEngine import SimState, TILE_BIT, TILE_PIPS, make_rng, set_size, iter_bits, zobrist_hash
+
+# Exploration weight of the UCT bound for win rates in [0, 1]
+UCT_EXPLORATION = math.sqrt(2)
+# Iterations per decision when no time budget is given
+DEFAULT_ITERATIONS = 1000
+# Nodes after which the tree stops growing; iterations then only add playouts
+MAX_NODES = 1_000_000
+# Move value of a pass node; tile nodes store the tile ID
+PASS_MOVE = -1
+
+
+def settle(state):
+    """
+    Draw for the player to move until they can play or the stock runs out.
+
+    Args:
+        state (SimState): Position to update in place.
+    """
+    if state.is_game_over():
+        return
+    player = state.current_player
+    while not state.valid_mask(player) and state.stock:
+        state.draw()
+
+
+def apply_move(state, move):
+    """
+    Play a tree move on a state, then make the next player's forced draws.
+
+    Args:
+        state (SimState): Position to update in place.
+        move (int): Tile ID, or PASS_MOVE.
+    """
+    if move == PASS_MOVE:
+        state.pass_turn()
+    else:
+        state.play(move)
+    settle(state)
+
+
+def result_targets(state):
+    """
+    Return, for every seat, the get_winner result that counts as a win for it.
+
+    Args:
+        state (SimState): Any position of the game.
+
+    Returns:
+        list[int | str]: The seat itself, or its team label in team mode.
+    """
+    if state.team_mode:
+        return ["Team 1" if seat in state.teams[0] else "Team 2"
+                for seat in range(state.num_players)]
+    return list(range(state.num_players))
+
+
+def redeal(state, hands, stock):
+    """
+    Copy a position with different hands and stock.
+
+    The board, open ends, passes and player to move are kept; pip totals and the
+    hash are rebuilt for the new tiles.
+
+    Args:
+        state (SimState): Position to copy. It is not modified.
+        hands (list[int]): Bitmask of every seat's new hand.
+        stock (list[int]): New stock tiles in draw order; the last one is drawn next.
+
+    Returns:
+        SimState: The new position.
+    """
+    sample = state.clone()
+    sample.hands = hands
+    sample.pips = []
+    for hand in hands:
+        sample.pips.append(sum(TILE_PIPS[tile] for tile in iter_bits(hand)))
+    sample.stock = stock
+    stock_mask = sum(TILE_BIT[tile] for tile in stock)
+    played_mask = ((1 << set_size(sample.max_pip)) - 1) ^ stock_mask
+    for hand in hands:
+        played_mask ^= hand
+    sample.hash = zobrist_hash(hands, stock_mask, played_mask,
+                               sample.left, sample.right, sample.passes)
+    return sample
+
+
+def determinize(state, observer, rng):
+    """
+    Deal the tiles an observer cannot see at random, keeping what they know.
+
+    The observer's hand, the board, the open ends and the number of tiles in every
+    hand and in the stock stay as they are. The other hands and the stock are
+    refilled from the unseen tiles, and the stock gets a new draw order.
+
+    Args:
+        state (SimState): The true position. It is not modified.
+        observer (int): Seat whose information set is sampled.
+        rng (random.Random): Source of randomness.
+
+    Returns:
+        SimState: A position the observer cannot tell apart from state.
+    """
+    unseen = list(state.stock)
+    for seat, hand in enumerate(state.hands):
+        if seat != observer:
+            unseen.extend(iter_bits(hand))
+    rng.shuffle(unseen)
+    hands = []
+    start = 0
+    for seat, hand in enumerate(state.hands):
+        if seat == observer:
+            hands.append(hand)
+            continue
+        size = hand.bit_count()
+        hands.append(sum(TILE_BIT[tile] for tile in unseen[start:start + size]))
+        start += size
+    return redeal(state, hands, unseen[start:])
+
+
+class MCTS:
+    """
+    UCT search tree that is reused across the decisions of a game.
+
+    Node i is described by entry i of each array. The children of a node are
+    created together when it is expanded and stored next to each other, so a
+    node only records where its first child is and how many there are. That
+    keeps a node at about 23 bytes, and trees of hundreds of thousands of nodes
+    fit in a few megabytes.
+
+    Attributes:
+        exploration (float): Exploration weight of the UCT bound.
+        max_nodes (int): Node count at which the tree stops growing.
+        moves (array): Tile ID played into each node, or PASS_MOVE for a pass
+            (and for the root).
+        movers (array): Seat that made the move into each node; -1 for the root.
+        first_child (array): Index of each node's first child; -1 until expanded.
+        num_children (array): Number of children of each expanded node; 0 for
+            finished games.
+        visits (array): Iterations that passed through each node.
+        wins (array): Of those, the ones won by the node's mover.
+        keys (array): Zobrist key of the position at each node, after the
+            forced draws of the player to move.
+    """
+
+    def __init__(self, exploration=UCT_EXPLORATION, max_nodes=MAX_NODES, rng=None):
+        """
+        Create an empty tree.
+
+        Args:
+            exploration (float): Exploration weight of the UCT bound.
+            max_nodes (int): Node count at which the tree stops growing.
+            rng (int | random.Random | None): Seed or generator for expansions and
+                playouts; None uses the global random module.
+        """
+        self.exploration = exploration
+        self.max_nodes = max_nodes
+        self.rng = make_rng(rng)
+        self.reset()
+
+    def reset(self):
+        """
+        Drop the whole tree.
+        """
+        self.moves = array("b")
+        self.movers = array("b")
+        self.first_child = array("i")
+        self.num_children = array("B")
+        self.visits = array("I")
+        self.wins = array("I")
+        self.keys = array("Q")
+        self.root_state = None
+        self.targets = None
+
+    def __len__(self):
+        return len(self.moves)
+
+    def _add_node(self, move, mover, key):
+        """
+        Append an unexpanded node and return its index.
+        """
+        self.moves.append(move)
+        self.movers.append(mover)
+        self.first_child.append(-1)
+        self.num_children.append(0)
+        self.visits.append(0)
+        self.wins.append(0)
+        self.keys.append(key)
+        return len(self.moves) - 1
+
+    def _set_root(self, state):
+        """
+        Make state the root, keeping the matching subtree if the tree has one.
+
+        Args:
+            state (SimState): Position to search from, after forced draws.
+        """
+        key = state.zobrist_key()
+        try:
+            node = self.keys.index(key)
+        except ValueError:
+            node = None
+        if node is None:
+            self.reset()
+            self._add_node(PASS_MOVE, -1, key)
+        elif node != 0:
+            self._reroot(node)
+        self.root_state = state
+        self.targets = result_targets(state)
+
+    def _reroot(self, node):
+        """
+        Keep only the subtree below node, with node as the new root.
+
+        The subtree is copied breadth first into new arrays, so children stay
+        next to each other and the indices stay dense.
+
+        Args:
+            node (int): Index of the new root.
+        """
+        moves, movers, first_child = self.moves, self.movers, self.first_child
+        num_children, visits, wins, keys = self.num_children, self.visits, self.wins, self.keys
+        self.reset()
+        self._add_node(PASS_MOVE, -1, keys[node])
+        self.visits[0] = visits[node]
+        queue = [node]
+        for new_node, old_node in enumerate(queue):
+            first = first_child[old_node]
+            if first < 0:
+                continue
+            self.first_child[new_node] = len(self.moves)
+            self.num_children[new_node] = num_children[old_node]
+            for child in range(first, first + num_children[old_node]):
+                new_child = self._add_node(moves[child], movers[child], keys[child])
+                self.visits[new_child] = visits[child]
+                self.wins[new_child] = wins[child]
+                queue.append(child)
+
+    def _expand(self, node, state):
+        """
+        Create the children of a leaf for every move the player to move has.
+
+        Args:
+            node (int): Index of the leaf.
+            state (SimState): Position at the leaf.
+        """
+        self.first_child[node] = len(self.moves)
+        if state.is_game_over():
+            return
+        player = state.current_player
+        valid = state.valid_mask(player)
+        moves = []
+        while valid:
+            bit = valid & -valid
+            moves.append(bit.bit_length() - 1)
+            valid ^= bit
+        if not moves:
+            moves.append(PASS_MOVE)
+        for move in moves:
+            child_state = state.clone()
+            apply_move(child_state, move)
+            self._add_node(move, player, child_state.zobrist_key())
+        self.num_children[node] = len(moves)
+
+    def _select(self, node):
+        """
+        Pick the child with the highest UCT bound; unvisited children come first.
+
+        Args:
+            node (int): Index of an expanded node with children.
+
+        Returns:
+            int: Index of the chosen child.
+        """
+        first = self.first_child[node]
+        children = range(first, first + self.num_children[node])
+        visits = self.visits
+        wins = self.wins
+        for child in children:
+            if not visits[child]:
+                return child
+        scale = self.exploration * math.sqrt(math.log(visits[node]))
+        return max(children, key=lambda child: wins[child] / visits[child]
+                   + scale / math.sqrt(visits[child]))
+
+    def iterate(self):
+        """
+        Run one selection, expansion, playout and backpropagation pass.
+        """
+        state = self.root_state.clone()
+        node = 0
+        path = [0]
+        while self.first_child[node] >= 0 and self.num_children[node]:
+            node = self._select(node)
+            apply_move(state, self.moves[node])
+            path.append(node)
+
+        if self.first_child[node] < 0 and len(self.moves) < self.max_nodes:
+            self._expand(node, state)
+            if self.num_children[node]:
+                node = self.first_child[node] + self.rng.randrange(self.num_children[node])
+                apply_move(state, self.moves[node])
+                path.append(node)
+
+        winner = state.playout(self.rng)
+        targets = self.targets
+        for node in path:
+            self.visits[node] += 1
+            mover = self.movers[node]
+            if mover >= 0 and winner == targets[mover]:
+                self.wins[node] += 1
+
+    def best_move(self, game, player_index, iterations=None, think_ms=None):
+        """
+        Search from a live position and return the most visited move.
+
+        Args:
+            game (DominoGame): The live game state. It is never modified.
+            player_index (int): Index of the AI player choosing a move.
+            iterations (int | None): Number of iterations; None runs
+                DEFAULT_ITERATIONS unless think_ms is given.
+            think_ms (float | None): Time budget in milliseconds. At least one
+                iteration always runs.
+
+        Returns:
+            int | None: ID of the best tile to play, or None to pass.
+        """
+        state = SimState.from_game(game)
+        state.current_player = player_index
+        if not state.valid_mask(player_index):
+            return None
+        self._set_root(state)
+
+        if think_ms is not None:
+            deadline = time.perf_counter() + think_ms / 1000
+            self.iterate()
+            while time.perf_counter() < deadline:
+                self.iterate()
+        else:
+            for _ in range(DEFAULT_ITERATIONS if iterations is None else iterations):
+                self.iterate()
+
+        if self.first_child[0] < 0:
+            # The tree was full before the root could be expanded
+            self._expand(0, state)
+        best = max(self.root_children(), key=lambda child: (self.visits[child], self.wins[child]))
+        return self.moves[best]
+
+    def root_children(self):
+        """
+        Return the node indices of the root's children.
+
+        Returns:
+            range: Indices into the node arrays.
+        """
+        first = self.first_child[0]
+        return range(first, first + self.num_children[0]) if first >= 0 else range(0)
+
+    def root_stats(self):
+        """
+        Summarize the root's children, e.g. for logging a decision.
+
+        Returns:
+            list[tuple[int, int, int]]: (move, visits, wins) per child, where move
+            is a tile ID or PASS_MOVE.
+        """
+        return [(self.moves[child], self.visits[child], self.wins[child])
+                for child in self.root_children()]
+
+
+class ISMCTS:
+    """
+    Single-observer information-set MCTS.
+
+    Every iteration deals a fresh determinization of the tiles the searching
+    player cannot see (see determinize) and walks one shared tree with it. A node
+    stands for a sequence of moves rather than a full position, so the statistics
+    of all samples add up in the same nodes. Children are added as samples
+    reveal new legal moves, which is why they are kept in sibling lists instead of
+    contiguous blocks. UCB uses each child's availability, the number of times it
+    was legal when its parent was visited, in place of the parent's visit count.
+
+    The tree is built for one decision and dropped afterwards.
+
+    Attributes:
+        exploration (float): Exploration weight of the UCB bound.
+        max_nodes (int): Node count at which the tree stops growing.
+        sampler (Callable): Function (state, observer, rng) -> SimState that deals
+            a determinization.
+        moves (array): Tile ID played into each node, or PASS_MOVE for a pass
+            (and for the root).
+        movers (array): Seat that made the move into each node; -1 for the root.
+        first_child (array): Index of each node's first child, or -1.
+        next_sibling (array): Index of each node's next sibling, or -1.
+        visits (array): Iterations that passed through each node.
+        wins (array): Of those, the ones won by the node's mover.
+        available (array): Iterations in which each node's move was legal.
+    """
+
+    def __init__(self, exploration=UCT_EXPLORATION, max_nodes=MAX_NODES, rng=None,
+                 sampler=determinize):
+        """
+        Create an empty search.
+
+        Args:
+            exploration (float): Exploration weight of the UCB bound.
+            max_nodes (int): Node count at which the tree stops growing.
+            rng (int | random.Random | None): Seed or generator for the samples,
+                expansions and playouts; None uses the global random module.
+            sampler (Callable): Determinization function; see determinize.
+        """
+        self.exploration = exploration
+        self.max_nodes = max_nodes
+        self.rng = make_rng(rng)
+        self.sampler = sampler
+        self.reset()
+
+    def reset(self):
+        """
+        Drop the tree.
+        """
+        self.moves = array("b")
+        self.movers = array("b")
+        self.first_child = array("i")
+        self.next_sibling = array("i")
+        self.visits = array("I")
+        self.wins = array("I")
+        self.available = array("I")
+
+    def __len__(self):
+        return len(self.moves)
+
+    def _add_node(self, parent, move, mover):
+        """
+        Append a node as the first child of parent and return its index.
+        """
+        node = len(self.moves)
+        self.moves.append(move)
+        self.movers.append(mover)
+        self.first_child.append(-1)
+        self.next_sibling.append(self.first_child[parent] if parent >= 0 else -1)
+        self.visits.append(0)
+        self.wins.append(0)
+        self.available.append(0)
+        if parent >= 0:
+            self.first_child[parent] = node
+        return node
+
+    def iterate(self, root_state, observer, targets):
+        """
+        Run one iteration on a new determinization.
+
+        Args:
+            root_state (SimState): The true position, with observer to move.
+            observer (int): Seat of the searching player.
+            targets (list[int | str]): result_targets(root_state).
+        """
+        rng = self.rng
+        state = self.sampler(root_state, observer, rng)
+        moves = self.moves
+        visits = self.visits
+        wins = self.wins
+        available = self.available
+        node = 0
+        path = [0]
+        while not state.is_game_over():
+            player = state.current_player
+            legal = state.valid_mask(player)
+            options = []
+            tried = 0
+            child = self.first_child[node]
+            while child >= 0:
+                move = moves[child]
+                # A pass is only legal without a playable tile
+                if (legal >> move & 1) if move != PASS_MOVE else not legal:
+                    options.append(child)
+                    if move != PASS_MOVE:
+                        tried |= 1 << move
+                child = self.next_sibling[child]
+            if legal:
+                untried = list(iter_bits(legal & ~tried))
+            else:
+                untried = [] if options else [PASS_MOVE]
+
+            if untried and len(moves) < self.max_nodes:
+                move = untried[rng.randrange(len(untried))]
+                node = self._add_node(node, move, player)
+                for option in options:
+                    available[option] += 1
+                available[node] += 1
+                path.append(node)
+                apply_move(state, move)
+                break
+            if not options:
+                break
+
+            for option in options:
+                available[option] += 1
+            for option in options:
+                if not visits[option]:
+                    node = option
+                    break
+            else:
+                node = max(options, key=lambda option: wins[option] / visits[option]
+                           + self.exploration * math.sqrt(math.log(available[option]) / visits[option]))
+            path.append(node)
+            apply_move(state, moves[node])
+
+        winner = state.playout(rng)
+        for node in path:
+            visits[node] += 1
+            mover = self.movers[node]
+            if mover >= 0 and winner == targets[mover]:
+                wins[node] += 1
+
+    def best_move(self, game, player_index, iterations=None, think_ms=None):
+        """
+        Search from the player's information set and return the most visited move.
+
+        Args:
+            game (DominoGame): The live game state. It is never modified, and only
+                what player_index can see is used for the decision.
+            player_index (int): Index of the AI player choosing a move.
+            iterations (int | None): Number of iterations; None runs
+                DEFAULT_ITERATIONS unless think_ms is given.
+            think_ms (float | None): Time budget in milliseconds. At least one
+                iteration always runs.
+
+        Returns:
+            int | None: ID of the best tile to play, or None to pass.
+        """
+        state = SimState.from_game(game)
+        state.current_player = player_index
+        valid = state.valid_mask(player_index)
+        if not valid:
+            return None
+        if not valid & (valid - 1):
+            return valid.bit_length() - 1
+        targets = result_targets(state)
+        self.reset()
+        self._add_node(-1, PASS_MOVE, -1)
+
+        if think_ms is not None:
+            deadline = time.perf_counter() + think_ms / 1000
+            self.iterate(state, player_index, targets)
+            while time.perf_counter() < deadline:
+                self.iterate(state, player_index, targets)
+        else:
+            for _ in range(DEFAULT_ITERATIONS if iterations is None else iterations):
+                self.iterate(state, player_index, targets)
+
+        children = []
+        child = self.first_child[0]
+        while child >= 0:
+            children.append(child)
+            child = self.next_sibling[child]
+        best = max(children, key=lambda child: (self.visits[child], self.wins[child]))
+        return self.moves[best]
+
+
+def ismcts_ai_move(game, player_index, think_ms=None, iterations=None, rng=None,
+                   sampler=determinize):
+    """
+    Choose a move with ISMCTS, seeing only what the player could see at the table.
+
+    Args:
+        game (DominoGame): The live game state. It is never modified.
+        player_index (int): Index of the AI player choosing a move.
+        think_ms (float | None): Time budget in milliseconds.
+        iterations (int | None): Number of iterations when think_ms is None;
+            None runs DEFAULT_ITERATIONS.
+        rng (int | random.Random | None): Seed or generator; None uses the global
+            random module.
+        sampler (Callable): Determinization function; see determinize.
+
+    Returns:
+        int | None: ID of the best tile to play, or None to pass.
+    """
+    return ISMCTS(rng=rng, sampler=sampler).best_move(game, player_index, iterations, think_ms)
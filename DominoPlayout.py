@@ -0,0 +1,124 @@
+"""
+Playout tasks of the Monte Carlo AI.
+
+Everything an executor worker runs lives here, so a worker only has to import
+this module and DominoEngine: playout_batch is the task monte_carlo_ai_move
+submits, cut_playout_wins runs depth-limited playouts and leaf_value scores the
+positions they stop in. DominoAI re-exports the three functions.
+"""
+
+import math
+import random
+from DominoEngine import PIP_MASK, FULL_MASK, SimState
+
+# Weights of leaf_value: per tile and per pip still held, per tile that fits an
+# open end, and for being the player to move. Fitted by least squares to the win
+# rates of full playouts with DominoBenchmark.fit_leaf_weights(leaf_samples())
+LEAF_TILE_WEIGHT = 0.4156
+LEAF_PIP_WEIGHT = 0.0131
+LEAF_END_WEIGHT = 0.1687
+LEAF_TURN_WEIGHT = 0.15
+
+
+def playout_batch(record, move, simulations, seed, target, rollout_depth=None):
+    """
+    Play one move and count wins over a batch of random playouts.
+
+    This is the task monte_carlo_ai_move hands to executor workers, so it only takes
+    plain picklable values.
+
+    Args:
+        record (bytes): Position from SimState.to_bytes, with the mover to play.
+        move (int): ID of the tile to play.
+        simulations (int): Number of playouts.
+        seed (int): Seed for this batch's generator.
+        target (int | str): Result of get_winner that counts as a win.
+        rollout_depth (int | None): Plies after which playouts are cut off and
+            scored with leaf_value; None plays to the end.
+
+    Returns:
+        int | float: Number of playouts won, counting cut-off ones fractionally.
+    """
+    after_move = SimState.from_bytes(record)
+    after_move.play(move)
+    rng = random.Random(seed)
+    if rollout_depth is not None:
+        return cut_playout_wins(after_move, simulations, target, rollout_depth, rng)
+    wins = 0
+    for _ in range(simulations):
+        if after_move.clone().playout(rng) == target:
+            wins += 1
+    return wins
+
+
+def cut_playout_wins(state, simulations, target, rollout_depth, rng):
+    """
+    Count wins over depth-limited playouts, scoring unfinished ones with leaf_value.
+
+    Args:
+        state (SimState): Starting position. It is not modified.
+        simulations (int): Number of playouts.
+        target (int | str): Result of get_winner that counts as a win.
+        rollout_depth (int): Plies after which a playout is cut off.
+        rng (random.Random): Source of randomness.
+
+    Returns:
+        float: Won playouts plus the estimated win chances of the cut-off ones.
+    """
+    wins = 0.0
+    for _ in range(simulations):
+        sim = state.clone()
+        result = sim.playout(rng, rollout_depth)
+        if result is None:
+            wins += leaf_value(sim, target)
+        elif result == target:
+            wins += 1
+    return wins
+
+
+def leaf_value(state, target, weights=None):
+    """
+    Estimate the chance that a player or team wins from an unfinished position.
+
+    Every seat gets a score from the tiles and pips it still holds, the number of
+    its tiles that fit an open end and whether it is to move. In free-for-all the
+    scores are turned into win chances with a softmax over the seats. In team mode
+    a team counts its best placed member for tiles, ends and turn, since one empty
+    hand wins for both, and its total pips; the difference between the two teams
+    goes through a logistic function.
+
+    Args:
+        state (SimState): Position to score, e.g. a cut-off playout.
+        target (int | str): Player index, or "Team 1"/"Team 2" in team mode.
+        weights (tuple[float, float, float, float] | None): Tile, pip, end and turn
+            weights to score with instead of the LEAF_*_WEIGHT constants.
+
+    Returns:
+        float: Estimated win chance between 0 and 1.
+    """
+    if weights is None:
+        tile_weight, pip_weight, end_weight, turn_weight = (
+            LEAF_TILE_WEIGHT, LEAF_PIP_WEIGHT, LEAF_END_WEIGHT, LEAF_TURN_WEIGHT)
+    else:
+        tile_weight, pip_weight, end_weight, turn_weight = weights
+    ends = FULL_MASK if state.left < 0 else PIP_MASK[state.left] | PIP_MASK[state.right]
+    seat_scores = []
+    for seat, hand in enumerate(state.hands):
+        score = end_weight * (hand & ends).bit_count() - tile_weight * hand.bit_count()
+        if seat == state.current_player:
+            score += turn_weight
+        seat_scores.append(score)
+
+    if state.team_mode:
+        team_scores = [
+            max(seat_scores[seat] for seat in team)
+            - pip_weight * sum(state.pips[seat] for seat in team)
+            for team in state.teams
+        ]
+        own = 0 if target == "Team 1" else 1
+        return 1 / (1 + math.exp(team_scores[1 - own] - team_scores[own]))
+
+    scores = [score - pip_weight * pips for score, pips in zip(seat_scores, state.pips)]
+    top = max(scores)
+    weights = [math.exp(score - top) for score in scores]
+    return weights[target] / sum(weights)
@@ -0,0 +1,209 @@
+"""
+Long-lived process pool for the Monte Carlo AI.
+
+A game session creates one WorkerPool when it starts and passes every AI decision
+through it, so worker start-up is paid once rather than per move, and a new game
+reuses the same workers. Positions travel to the workers as SimState.to_bytes
+records (see DominoPlayout.playout_batch), never as pickled DominoGame objects.
+"""
+
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor, TimeoutError
+from concurrent.futures.process import BrokenProcessPool
+
+# Modules the fork server imports once, so every worker starts with them loaded;
+# DominoPlayout holds every task a worker runs and imports only the engine
+WORKER_PRELOAD = ["DominoEngine", "DominoPlayout"]
+
+
+def worker_context():
+    """
+    Pick how worker processes are started.
+
+    Where the platform has it, workers are forked from a fork server that has
+    imported only WORKER_PRELOAD, so they start with the engine ready and never
+    inherit the Tk window or the music thread of the GUI process. Elsewhere
+    (Windows) they are spawned as fresh interpreters.
+
+    Some Python versions start the fork server without the parent's sys.path, so
+    the preload only finds the modules when the game runs from this folder, as it
+    must anyway to find BGM.mp3. Otherwise a worker imports DominoPlayout with its
+    first task.
+
+    Returns:
+        multiprocessing.context.BaseContext: Context for the pool's processes.
+    """
+    if "forkserver" in multiprocessing.get_all_start_methods():
+        context = multiprocessing.get_context("forkserver")
+        context.set_forkserver_preload(WORKER_PRELOAD)
+        return context
+    return multiprocessing.get_context("spawn")
+
+
+def _ping():
+    """
+    Trivial task used to start workers and check that they answer.
+
+    Returns:
+        int: Process ID of the worker that ran it.
+    """
+    return os.getpid()
+
+
+class WorkerPool:
+    """
+    Process pool shared by every AI seat of a game session.
+
+    Workers are started by worker_context(). Either way a worker still imports the
+    launching script as __mp_main__, so scripts keep their GUI imports under their
+    __main__ guard. A pool of size 0 runs no processes and makes every decision in
+    the calling process.
+
+    Attributes:
+        size (int): Number of worker processes.
+        restarts (int): How many times the pool has been restarted.
+    """
+
+    def __init__(self, size=None):
+        """
+        Start the pool.
+
+        Args:
+            size (int | None): Number of worker processes; None picks default_size().
+        """
+        self.size = self.default_size() if size is None else size
+        self.restarts = 0
+        self._executor = None
+        self.start()
+
+    @staticmethod
+    def default_size():
+        """
+        Pick a pool size that leaves a core for the GUI.
+
+        Returns:
+            int: One less than the number of cores, or 0 (no pool) on machines
+            with two cores or fewer, where a pool cannot beat a single process.
+        """
+        cores = os.cpu_count() or 1
+        return cores - 1 if cores > 2 else 0
+
+    def start(self):
+        """
+        Start the worker processes if the pool is not running.
+
+        Each worker gets a start-up task straight away, so the processes start
+        while the GUI is still drawing the first position.
+        """
+        if self._executor is not None or self.size <= 0:
+            return
+        self._executor = ProcessPoolExecutor(
+            max_workers=self.size,
+            mp_context=worker_context(),
+        )
+        for _ in range(self.size):
+            self._executor.submit(_ping)
+
+    def submit(self, fn, *args, **kwargs):
+        """
+        Schedule a task on a worker, restarting the pool once if it is broken.
+
+        This makes the pool usable wherever a concurrent.futures executor is expected.
+
+        Args:
+            fn (Callable): Picklable top-level function.
+            *args: Positional arguments for fn.
+            **kwargs: Keyword arguments for fn.
+
+        Returns:
+            concurrent.futures.Future: The task's future.
+
+        Raises:
+            RuntimeError: If the pool has size 0 or was shut down.
+        """
+        if self._executor is None:
+            raise RuntimeError("Worker pool is not running")
+        try:
+            return self._executor.submit(fn, *args, **kwargs)
+        except BrokenProcessPool:
+            self.restart()
+            return self._executor.submit(fn, *args, **kwargs)
+
+    def best_move(self, game, player_index, **kwargs):
+        """
+        Choose a move with monte_carlo_ai_move, running the playouts on the pool.
+
+        If a worker dies during the decision, the pool is restarted for the next
+        one and this decision is finished in the calling process.
+
+        Args:
+            game (DominoGame): The live game state. It is never modified.
+            player_index (int): Index of the AI player choosing a move.
+            **kwargs: Further arguments for monte_carlo_ai_move.
+
+        Returns:
+            int | None: ID of the best tile to play, or None to pass.
+        """
+        # Imported here so workers, which import this module through the launching
+        # script, never load the AI's search modules or NumPy
+        from DominoAI import monte_carlo_ai_move
+        if self._executor is None:
+            return monte_carlo_ai_move(game, player_index, **kwargs)
+        try:
+            return monte_carlo_ai_move(game, player_index, executor=self, **kwargs)
+        except BrokenProcessPool:
+            self.restart()
+            return monte_carlo_ai_move(game, player_index, **kwargs)
+
+    def healthy(self, timeout=5.0):
+        """
+        Check that the workers answer.
+
+        Args:
+            timeout (float): Seconds to wait for an answer.
+
+        Returns:
+            bool: True if a worker ran a task in time (always True for size 0).
+        """
+        if self._executor is None:
+            return self.size <= 0
+        try:
+            self.submit(_ping).result(timeout)
+            return True
+        except (BrokenProcessPool, TimeoutError):
+            return False
+
+    def restart(self):
+        """
+        Replace the worker processes, dropping any queued tasks.
+        """
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+        self.restarts += 1
+        self.start()
+
+    def resize(self, size):
+        """
+        Change the number of workers.
+
+        Args:
+            size (int): New number of worker processes; 0 stops the pool.
+        """
+        self.size = size
+        self.restart()
+
+    def shutdown(self):
+        """
+        Stop the workers. Call this when the session ends.
+        """
+        if self._executor is not None:
+            self._executor.shutdown(wait=True, cancel_futures=True)
+            self._executor = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.shutdown()